@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable
+
+from market_calendar import MarketCalendar
+
+class AsOfIndex:
+    """
+    As-of lookup structure for a daily close frame, built once per frame.
+
+    Dates are kept as a sorted int64 (ns) array and lookups use binary search,
+    so "last valid close on or before date X" is O(log n) without slicing the
+    frame. Values are forward-filled per column at build time, so a missing bar
+    for one ticker falls back to that ticker's previous close.
+    """
+
+    def __init__(self, prices: pd.DataFrame):
+        if not prices.index.is_monotonic_increasing:
+            prices = prices.sort_index()
+
+        self.columns = prices.columns
+        self.index = pd.DatetimeIndex(prices.index)
+        self.dates = self.index.as_unit('ns').asi8
+        self.values = prices.ffill().to_numpy(dtype=np.float64)
+
+        # Month-end session table: position of the last session of every month.
+        # The last row only counts when its month is complete (no later NYSE session in it)
+        months = self.index.to_numpy().astype('datetime64[M]')
+        is_month_end = np.zeros(len(months), dtype=bool)
+        is_month_end[:-1] = months[1:] != months[:-1]
+        if len(months):
+            is_month_end[-1] = self._is_last_session_of_month(self.index[-1])
+        self.month_end_positions = np.flatnonzero(is_month_end)
+
+    @staticmethod
+    def _is_last_session_of_month(day: pd.Timestamp) -> bool:
+        try:
+            return MarketCalendar.next_session([day])[0].month != day.month
+        except ValueError:
+            # Outside the calendar table: fall back to the last business day of the month
+            return day.normalize() >= day + pd.offsets.BMonthEnd(0)
+
+    @staticmethod
+    def _to_int64(dates) -> np.ndarray:
+        return pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).as_unit('ns').asi8
+
+    def locate(self, dates: Iterable[pd.Timestamp]) -> np.ndarray:
+        """
+        Returns the row position of the last session on or before each date (-1 if none).
+        """
+        return np.searchsorted(self.dates, self._to_int64(dates), side='right') - 1
+
+    def price_at(self, target_date: pd.Timestamp) -> pd.Series:
+        """
+        Gets the closes at target_date or the nearest previous session.
+        The returned Series is named with the session date that was used.
+        """
+        position = np.searchsorted(self.dates, pd.Timestamp(target_date).as_unit('ns').value, side='right') - 1
+        if position < 0:
+            raise ValueError(f"No data available before or on {target_date}")
+        return pd.Series(self.values[position], index=self.columns, name=self.index[position])
+
+    def prices_at(self, dates: Iterable[pd.Timestamp]) -> pd.DataFrame:
+        """
+        Vectorized as-of lookup for many dates at once.
+
+        Returns:
+            pd.DataFrame indexed by the requested dates with one column per asset.
+            Dates before the first session give NaN rows.
+        """
+        requested = pd.DatetimeIndex(pd.to_datetime(list(dates)))
+        positions = self.locate(requested)
+
+        values = self.values[np.clip(positions, 0, None)]
+        values[positions < 0] = np.nan
+        return pd.DataFrame(values, index=requested, columns=self.columns)
+
+    def sessions_at(self, dates: Iterable[pd.Timestamp]) -> pd.DatetimeIndex:
+        """
+        Returns the session date actually used for each requested date (NaT if none).
+        """
+        positions = self.locate(dates)
+        sessions = self.index[np.clip(positions, 0, None)].to_numpy().copy()
+        sessions[positions < 0] = np.datetime64('NaT')
+        return pd.DatetimeIndex(sessions)
+
+    @property
+    def month_end_sessions(self) -> pd.DatetimeIndex:
+        return self.index[self.month_end_positions]
+
+    def month_end_closes(self) -> pd.DataFrame:
+        """
+        Closes at the last session of every month, indexed by the session date.
+        """
+        return pd.DataFrame(self.values[self.month_end_positions], index=self.month_end_sessions, columns=self.columns)
@@ -0,0 +1,249 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import yaml
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import data_quality
+import momentum_engine
+import reporter as reporter_module
+import strategy_gem
+from data_provider import DataProvider
+from data_quality import DataQualityValidator
+from history_store import HistoryStore
+from market_calendar import MarketCalendar
+from momentum_engine import BlendedMomentum
+from reporter import Reporter
+from strategy_gem import GemStrategy
+
+# Per-process strategy, validator and reporter, created once by _init_worker
+_worker = {}
+
+def _init_worker(config: Dict, output_dir: str):
+    validation_config = config.get('validation', {})
+    _worker['strategy'] = GemStrategy(config)
+    _worker['validator'] = DataQualityValidator.from_config(validation_config)
+    _worker['fail_on'] = validation_config.get('fail_on', 'error')
+    _worker['reporter'] = Reporter(output_dir=output_dir)
+    _worker['tickers'] = config['tickers']
+
+def _render_month(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Data quality, decision and report content for one month-end (runs in a worker).
+
+    Like the monthly run, a month that fails the data-quality check gets no
+    decision: it is returned with 'quality_failed' set and nothing else.
+    """
+    quality = _worker['validator'].validate(task['prices'], task['analysis_date'], task['monthly_prices'].index,
+                                            expected_columns=list(_worker['tickers']))
+    result = {"month": task['month'], "analysis_date": task['analysis_date']}
+    if quality.should_fail(_worker['fail_on']):
+        result["quality_failed"] = quality.describe()
+        return result
+
+    decision = _worker['strategy'].calculate_decision_from_history(task['monthly_prices'])
+    result["decision"] = decision
+    result["content"] = _worker['reporter'].generate_report_content(decision, task['analysis_date'], _worker['tickers'], quality)
+    return result
+
+class ReportBackfill:
+    """
+    Regenerates monthly reports (and optionally history rows) for a range of month-ends.
+
+    All months are computed from one shared daily price matrix: a single
+    get_closes call for the whole range (served from the local price store once
+    it is warm), then a batched as-of lookup of the monthly price points.
+    Strategy and report rendering are fanned out across a process pool.
+
+    A month is skipped when its inputs hash is unchanged since the last backfill
+    and its report still exists. The hash covers the daily prices of the month's
+    lookback window (validated and summarized in the report's data-quality
+    section), the tickers, strategy and validation config, and the source of the
+    strategy, validator and reporter modules, so code or config changes
+    regenerate everything while unchanged months cost nothing.
+
+    Every month runs the same data-quality check as the monthly run. A month
+    that fails it (validation.fail_on) gets no report or history row and is
+    listed under 'quality_failed'; it is retried on the next backfill.
+    """
+
+    def __init__(self, config: Dict, output_dir: str = "app/reports", manifest_path: str = "app/data/backfill_manifest.json"):
+        self.config = config
+        self.output_dir = output_dir
+        self.manifest_path = manifest_path
+        self.momentum = BlendedMomentum.from_config(config['strategy'])
+        self._fingerprint = self._code_fingerprint()
+
+    @staticmethod
+    def _code_fingerprint() -> str:
+        digest = hashlib.sha256()
+        for module in (reporter_module, strategy_gem, momentum_engine, data_quality):
+            with open(module.__file__, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def fetch_start(self, first_month_end: pd.Timestamp) -> pd.Timestamp:
+        """
+        First date of price history needed for the earliest month (longest horizon plus a month of buffer).
+        """
+        return first_month_end - pd.DateOffset(months=self.momentum.max_months + 1)
+
+    def inputs_hash(self, analysis_date: pd.Timestamp, monthly_prices: pd.DataFrame, prices: pd.DataFrame) -> str:
+        digest = hashlib.sha256(self._fingerprint.encode())
+        digest.update(json.dumps({"tickers": self.config['tickers'], "strategy": self.config['strategy'],
+                                  "validation": self.config.get('validation', {})}, sort_keys=True, default=str).encode())
+        digest.update(analysis_date.strftime('%Y-%m-%d').encode())
+        digest.update(monthly_prices.to_numpy(dtype='float64').tobytes())
+        digest.update(prices.index.asi8.tobytes())
+        digest.update(prices.to_numpy(dtype='float64').tobytes())
+        return digest.hexdigest()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        if not os.path.isfile(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, str]):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def plan(self, prices: pd.DataFrame, month_ends: pd.DatetimeIndex, force: bool = False) -> Dict[str, Any]:
+        """
+        Builds one task per month-end whose inputs changed.
+
+        Args:
+            prices: Daily closes (columns: ticker keys) covering every lookback window.
+                Each month is validated on its own window, from fetch_start(month-end).
+            month_ends: Analysis dates (last session of each month).
+            force: Regenerate every month regardless of the manifest.
+
+        Returns:
+            Dict with 'tasks', 'hashes' (month -> inputs hash), 'unchanged' and 'missing_data' month lists.
+        """
+        manifest = {} if force else self._load_manifest()
+        dp = DataProvider()
+
+        # All month-end price points in one batched as-of lookup
+        max_months = self.momentum.max_months
+        point_dates = [p for d in month_ends for p in MarketCalendar.month_end_points(d, max_months)]
+        points = dp.get_prices_at_dates(prices, point_dates)
+
+        tasks, hashes, unchanged, missing_data = [], {}, [], []
+        for i, analysis_date in enumerate(month_ends):
+            month = analysis_date.strftime('%Y-%m')
+            monthly_prices = points.iloc[i * (max_months + 1):(i + 1) * (max_months + 1)]
+            if monthly_prices[list(self.config['tickers'])].isna().any().any():
+                missing_data.append(month)
+                continue
+
+            # The daily window a monthly run for this month would fetch and validate
+            window = prices.loc[self.fetch_start(analysis_date):analysis_date, list(self.config['tickers'])]
+            inputs_hash = self.inputs_hash(analysis_date, monthly_prices, window)
+            hashes[month] = inputs_hash
+            report_path = os.path.join(self.output_dir, f"{month}.md")
+            if manifest.get(month) == inputs_hash and os.path.isfile(report_path):
+                unchanged.append(month)
+                continue
+            tasks.append({"month": month, "analysis_date": analysis_date, "monthly_prices": monthly_prices, "prices": window})
+        return {"tasks": tasks, "hashes": hashes, "unchanged": unchanged, "missing_data": missing_data}
+
+    def run(self, prices: pd.DataFrame, month_ends: pd.DatetimeIndex, workers: Optional[int] = None,
+            force: bool = False, history: Optional[HistoryStore] = None) -> Dict[str, Any]:
+        """
+        Regenerates the reports for month_ends and writes them in one atomic batch.
+
+        Returns:
+            Dict with the 'written', 'unchanged' and 'missing_data' month lists and
+            'quality_failed' ({month: issues} for months that failed the data-quality check).
+        """
+        plan = self.plan(prices, month_ends, force)
+        tasks = plan['tasks']
+
+        results, quality_failed = [], {}
+        if tasks:
+            workers = workers or os.cpu_count()
+            chunksize = max(1, len(tasks) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.config, self.output_dir)) as pool:
+                rendered = list(pool.map(_render_month, tasks, chunksize=chunksize))
+            quality_failed = {r['month']: r['quality_failed'] for r in rendered if 'quality_failed' in r}
+            results = [r for r in rendered if 'quality_failed' not in r]
+
+            Reporter(output_dir=self.output_dir).save_reports({r['month']: r['content'] for r in results})
+            if history is not None:
+                history.upsert_many([HistoryStore.record_from_decision(r['decision'], r['analysis_date']) for r in results])
+
+            # Manifest last: if anything above fails, the months are regenerated next time
+            manifest = {} if force else self._load_manifest()
+            manifest.update({r['month']: plan['hashes'][r['month']] for r in results})
+            self._save_manifest(manifest)
+
+        return {
+            "written": [r['month'] for r in results],
+            "unchanged": plan['unchanged'],
+            "missing_data": plan['missing_data'],
+            "quality_failed": quality_failed,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate monthly GEM reports for a range of months.")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--start", required=True, help="First month (YYYY-MM).")
+    parser.add_argument("--end", default=None, help="Last month (YYYY-MM, default: last completed month).")
+    parser.add_argument("--output-dir", default="app/reports")
+    parser.add_argument("--history", action="store_true", help="Also upsert the decisions into the history store.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Regenerate months whose inputs did not change.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+
+    start = pd.Timestamp(args.start)
+    if args.end:
+        end = pd.Timestamp(args.end) + pd.offsets.MonthEnd(0)
+    else:
+        end = pd.Timestamp.today().normalize().replace(day=1) - pd.Timedelta(days=1)
+    month_ends = MarketCalendar.month_end_sessions(start, end)
+    if len(month_ends) == 0:
+        print(f"No month-ends between {start.date()} and {end.date()}.")
+        return
+
+    backfill = ReportBackfill(config, output_dir=args.output_dir)
+    t0 = time.perf_counter()
+    # One price matrix for every month in the range
+    prices = DataProvider.from_config(config).get_closes(config['tickers'], backfill.fetch_start(month_ends[0]), month_ends[-1])
+    t1 = time.perf_counter()
+
+    history = None
+    if args.history:
+        history_config = config.get('history', {})
+        history = HistoryStore(
+            db_path=history_config.get('db_path', 'app/data/history.sqlite'),
+            csv_path=history_config.get('csv_path', 'app/decisions.csv')
+        )
+    try:
+        result = backfill.run(prices, month_ends, workers=args.workers, force=args.force, history=history)
+    finally:
+        if history is not None:
+            history.close()
+    t2 = time.perf_counter()
+
+    print(f"Wrote {len(result['written'])} reports, {len(result['unchanged'])} unchanged, "
+          f"{len(result['missing_data'])} skipped for missing prices, {len(result['quality_failed'])} failed data quality "
+          f"(prices {t1 - t0:.2f}s, reports {t2 - t1:.2f}s).")
+    if result['missing_data']:
+        print(f"Months without a full lookback window: {result['missing_data'][0]} .. {result['missing_data'][-1]}")
+    for month, issues in result['quality_failed'].items():
+        print(f"{month}: data quality check failed, no report written:\n{issues}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import yaml
+import numpy as np
+import pandas as pd
+from typing import Dict, Any
+
+from as_of_index import AsOfIndex
+from data_provider import DataProvider
+from strategy_gem import GemStrategy
+
+class Backtester:
+    def __init__(self, config: Dict):
+        self.config = config
+        self.strategy = GemStrategy(config)
+
+    @staticmethod
+    def get_month_end_closes(prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Resamples daily closes to the last available session of every month.
+        The index keeps the real session dates (not calendar month ends).
+
+        The last row only counts when its month is complete (see AsOfIndex), so a
+        history ending mid-month yields no partial-month decision.
+        """
+        return AsOfIndex(prices.dropna(how='all')).month_end_closes()
+
+    def run(self, prices: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Runs the GEM rule over the full price history in one vectorized pass.
+
+        The decision taken at month-end t is held during month t+1.
+
+        Args:
+            prices: Daily closes, columns are the ticker keys (as returned by DataProvider.get_closes).
+
+        Returns:
+            Dict containing decisions, equity curve, monthly returns and summary stats.
+        """
+        monthly = self.get_month_end_closes(prices)
+        decisions = self.strategy.calculate_decisions(monthly)
+        if len(decisions) < 2:
+            raise ValueError("Not enough history to backtest: need at least two months with a full lookback window.")
+
+        # Asset returns over the month following every decision
+        monthly = monthly.loc[decisions.index[0]:]
+        next_returns = (monthly.shift(-1) / monthly - 1).loc[decisions.index]
+
+        columns = list(next_returns.columns)
+        if 'selected_assets' in decisions:
+            # Custom rotation with top_k > 1: equal weight across the selected assets
+            weights = np.zeros((len(decisions), len(columns)))
+            for row, keys in enumerate(decisions['selected_assets']):
+                keys = keys.split(",")
+                weights[row, [columns.index(key) for key in keys]] = 1 / len(keys)
+            held_returns = (np.nan_to_num(next_returns.to_numpy()) * weights).sum(axis=1)
+            holdings = decisions['selected_assets']
+        else:
+            held = np.array([columns.index(key) for key in decisions['selected_asset_key']])
+            held_returns = next_returns.to_numpy()[np.arange(len(held)), held]
+            holdings = decisions['selected_asset_key']
+
+        # Last decision has no following month yet, missing bars count as flat
+        strategy_returns = pd.Series(np.nan_to_num(held_returns[:-1]), index=decisions.index[1:])
+
+        equity = pd.concat([
+            pd.Series([1.0], index=decisions.index[:1]),
+            (1 + strategy_returns).cumprod()
+        ])
+
+        switches = (holdings != holdings.shift()).iloc[1:]
+
+        years = (equity.index[-1] - equity.index[0]).days / 365.25
+        cagr = equity.iloc[-1] ** (1 / years) - 1 if years > 0 else 0.0
+        drawdown = equity / equity.cummax() - 1
+
+        return {
+            "decisions": decisions,
+            "returns": strategy_returns,
+            "equity": equity,
+            "drawdown": drawdown,
+            "stats": {
+                "start": equity.index[0],
+                "end": equity.index[-1],
+                "months": len(strategy_returns),
+                "cagr": cagr,
+                "max_drawdown": drawdown.min(),
+                "switches": int(switches.sum()),
+                # Full switch = 100% of the portfolio traded
+                "turnover_per_year": switches.sum() / years if years > 0 else 0.0,
+                "final_equity": equity.iloc[-1],
+            }
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-history backtest of the GEM rule.")
+    parser.add_argument("--start", default="2005-01-01", help="First date of price history (YYYY-MM-DD).")
+    parser.add_argument("--end", default=None, help="Last date of price history (default: today).")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--output", default=None, help="Optional CSV path for decisions and equity curve.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    start_date = pd.Timestamp(args.start)
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize()
+
+    dp = DataProvider.from_config(config)
+    prices = dp.get_closes(config['tickers'], start_date, end_date)
+
+    result = Backtester(config).run(prices)
+    stats = result['stats']
+
+    print(f"Backtest {stats['start'].date()} - {stats['end'].date()} ({stats['months']} months)")
+    print(f"  CAGR:              {stats['cagr']:.2%}")
+    print(f"  Max drawdown:      {stats['max_drawdown']:.2%}")
+    print(f"  Switches:          {stats['switches']} ({stats['turnover_per_year']:.2f} per year)")
+    print(f"  Final equity:      {stats['final_equity']:.2f}")
+
+    if args.output:
+        output = result['decisions'].copy()
+        output['equity'] = result['equity']
+        output['drawdown'] = result['drawdown']
+        output.to_csv(args.output, index_label="date")
+        print(f"Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
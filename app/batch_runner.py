@@ -0,0 +1,196 @@
+import argparse
+import copy
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Any, Optional
+
+from instrumentation import RunTracer
+from main import check_work_needed, lazy_import, load_config, publish_decision, setup_logging
+
+logger = logging.getLogger(__name__)
+
+def deep_merge(base: Dict, override: Dict) -> Dict:
+    """
+    Returns base updated with override; nested dicts are merged, everything else is replaced.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+class ProfileBatch:
+    """
+    Runs the monthly decision for many client profiles with one shared data fetch.
+
+    Every *.yaml file in the profiles directory is a partial config merged over
+    the base config (tickers, strategy, email, ... - whatever differs). The
+    batch computes the union of the profiles' symbols and the widest lookback
+    window, fetches that once (through the price store), then runs each
+    profile's data-quality, strategy, report, email and history stages
+    (main.publish_decision) concurrently on its slice of the shared matrix.
+
+    Outputs are isolated per profile under output_root/<name>/: reports,
+    history database and CSV, delivery status and spans, unless the profile
+    file sets those paths itself. A failing profile does not stop the others.
+    """
+
+    def __init__(self, base_config: Dict, profiles_dir: str, output_root: str = "app/profiles"):
+        self.base_config = base_config
+        self.output_root = output_root
+        self.profiles = self.load_profiles(profiles_dir)
+
+    def load_profiles(self, profiles_dir: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {name: {'config', 'reports_dir', 'log_dir'}}, the name being the file name without extension.
+        """
+        yaml = lazy_import("yaml")
+        paths = sorted(glob.glob(os.path.join(profiles_dir, "*.yaml")) + glob.glob(os.path.join(profiles_dir, "*.yml")))
+        if not paths:
+            raise ValueError(f"No profile configs (*.yaml) in {profiles_dir}.")
+
+        profiles = {}
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(path, "r") as f:
+                overrides = yaml.safe_load(f) or {}
+            profile_dir = os.path.join(self.output_root, name)
+
+            # Isolated state per profile, unless the profile sets the paths explicitly
+            defaults = {
+                'history': {'db_path': os.path.join(profile_dir, "history.sqlite"),
+                            'csv_path': os.path.join(profile_dir, "decisions.csv")},
+                'email': {'delivery': {'status_path': os.path.join(profile_dir, "deliveries.sqlite")}},
+            }
+            config = deep_merge(deep_merge(self.base_config, defaults), overrides)
+            profiles[name] = {
+                "config": config,
+                "reports_dir": overrides.get('output', {}).get('reports_dir', os.path.join(profile_dir, "reports")),
+                "log_dir": os.path.join(profile_dir, "logs"),
+            }
+        return profiles
+
+    def symbols(self, names: Optional[List[str]] = None) -> List[str]:
+        """
+        Union of the ticker symbols of the given profiles (default: all), in first-seen order.
+        """
+        names = names if names is not None else list(self.profiles)
+        return list(dict.fromkeys(s for name in names for s in self.profiles[name]['config']['tickers'].values()))
+
+    def fetch_start(self, analysis_date, names: Optional[List[str]] = None):
+        """
+        Start of the widest window: the longest momentum horizon of any profile, plus a month of buffer.
+        """
+        pd = lazy_import("pandas")
+        MarketCalendar = lazy_import("market_calendar").MarketCalendar
+        BlendedMomentum = lazy_import("momentum_engine").BlendedMomentum
+        names = names if names is not None else list(self.profiles)
+        max_months = max(BlendedMomentum.from_config(self.profiles[n]['config']['strategy']).max_months for n in names)
+        return MarketCalendar.get_lookback_date(analysis_date, max_months) - pd.DateOffset(months=1)
+
+    def run_profile(self, name: str, prices, analysis_date) -> Dict[str, Any]:
+        """
+        Decision, report, email and history for one profile on the shared close matrix (runs in a worker thread).
+        """
+        DataProvider = lazy_import("data_provider").DataProvider
+        BlendedMomentum = lazy_import("momentum_engine").BlendedMomentum
+        MarketCalendar = lazy_import("market_calendar").MarketCalendar
+
+        profile = self.profiles[name]
+        config = profile['config']
+        log = logging.getLogger(f"{__name__}.{name}")
+        tracer = RunTracer(path=os.path.join(profile['log_dir'], "spans.jsonl"))
+        start = time.perf_counter()
+        try:
+            # The profile's columns, renamed to its ticker keys (a symbol that failed to
+            # fetch becomes a NaN column, reported as missing_column by the data-quality stage)
+            tickers = config['tickers']
+            prices_df = prices.reindex(columns=list(tickers.values()))
+            prices_df.columns = list(tickers)
+            likback_months = BlendedMomentum.from_config(config['strategy']).max_months
+            point_dates = list(MarketCalendar.month_end_points(analysis_date, likback_months))
+            monthly_prices = DataProvider().get_prices_at_dates(prices_df, point_dates)
+
+            decision = publish_decision(config, prices_df, monthly_prices, analysis_date, point_dates, tracer,
+                                        reports_dir=profile['reports_dir'], log=log)
+            return {"profile": name, "status": "ok", "selected": decision['selected_ticker'], "mode": decision['mode'],
+                    "seconds": time.perf_counter() - start}
+        except Exception as e:
+            log.error(f"Profile {name} failed: {e}", exc_info=True)
+            return {"profile": name, "status": "error", "error": f"{type(e).__name__}: {e}",
+                    "seconds": time.perf_counter() - start}
+
+    def run(self, today: date, force: bool = False, scheduled: bool = False, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Runs every profile that still needs this month's report or history row.
+
+        Returns:
+            One result dict per profile ('status': ok, error or skipped).
+        """
+        pending = [name for name, p in self.profiles.items()
+                   if force or check_work_needed(p['config'], today, scheduled, reports_dir=p['reports_dir'])]
+        results = [{"profile": name, "status": "skipped"} for name in self.profiles if name not in pending]
+        if not pending:
+            return results
+
+        MarketCalendar = lazy_import("market_calendar").MarketCalendar
+        DataProvider = lazy_import("data_provider").DataProvider
+        analysis_date = MarketCalendar.get_last_trading_session_last_month(today)
+        symbols = self.symbols(pending)
+        start = self.fetch_start(analysis_date, pending)
+
+        # One fetch for all profiles: union of symbols over the widest window
+        logger.info(f"Fetching {len(symbols)} symbols for {len(pending)} profiles from {start.date()} to {analysis_date.date()}")
+        dp = DataProvider.from_config(self.base_config)
+        # A failed symbol only fails the profiles using it (through their data-quality stage)
+        prices = dp.get_closes({s: s for s in symbols}, start, analysis_date, allow_partial=True)
+        logger.info(f"Fetch stats: {dp.stats}")
+
+        # Stage modules are imported here: concurrent first imports from the worker threads
+        # could see a partially initialized module
+        for module_name in ("data_quality", "strategy_gem", "reporter", "email_resend"):
+            lazy_import(module_name)
+        with ThreadPoolExecutor(max_workers=workers or len(pending)) as pool:
+            results += list(pool.map(lambda name: self.run_profile(name, prices, analysis_date), pending))
+        return sorted(results, key=lambda r: r['profile'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the monthly GEM decision for a directory of client profiles.")
+    parser.add_argument("--profiles", required=True, help="Directory of profile configs (*.yaml), merged over --config.")
+    parser.add_argument("--config", default="app/config/config.yaml", help="Base config (data source, defaults).")
+    parser.add_argument("--output-root", default="app/profiles", help="Per-profile reports, history and logs.")
+    parser.add_argument("--workers", type=int, default=None, help="Profiles run concurrently (default: all).")
+    parser.add_argument("--force", action="store_true", help="Run profiles whose report and history already exist.")
+    parser.add_argument("--scheduled", action="store_true", help="Only run on the first Monday of the month.")
+    args = parser.parse_args()
+
+    setup_logging()
+    lazy_import("dotenv").load_dotenv()
+    config = load_config(args.config)
+    # Same environment overrides as the single run; profiles can still set their own recipients
+    if os.getenv("EMAIL_FROM"):
+        config['email']['from'] = os.getenv("EMAIL_FROM")
+    if os.getenv("EMAIL_TO"):
+        config['email']['to'] = os.getenv("EMAIL_TO")
+    batch = ProfileBatch(config, args.profiles, output_root=args.output_root)
+    results = batch.run(date.today(), force=args.force, scheduled=args.scheduled, workers=args.workers)
+
+    for r in results:
+        if r['status'] == "ok":
+            logger.info(f"{r['profile']:<20} ok       {r['selected']} ({r['mode']}) in {r['seconds']:.2f}s")
+        elif r['status'] == "error":
+            logger.info(f"{r['profile']:<20} error    {r['error']}")
+        else:
+            logger.info(f"{r['profile']:<20} skipped  (report and history exist)")
+    if any(r['status'] == "error" for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
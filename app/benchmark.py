@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import pandas as pd
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from markdown_renderer import MarkdownRenderer
+from reporter import Reporter
+from strategy_gem import GemStrategy
+from synthetic_data import SyntheticDataProvider
+
+GEM_TICKERS = {'US': 'SPY', 'EXUS': 'VEU', 'BONDS': 'BND', 'CASH_PROXY': 'BIL'}
+GEM_CONFIG = {
+    'tickers': GEM_TICKERS,
+    'strategy': {'lookback_months': 12},
+    'email': {'from': 'bench@example.com', 'to': 'bench@example.com', 'subject_prefix': 'Bench'},
+}
+
+# (name, years of daily history, number of symbols)
+SIZES = [
+    ("small", 2, 4),
+    ("medium", 10, 50),
+    ("large", 25, 500),
+]
+
+def time_call(func: Callable, repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """
+    Runs func number times per sample, repeat samples. Returns per-call seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"min": min(samples), "median": statistics.median(samples)}
+
+def bench_size(years: int, n_symbols: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    end_date = pd.Timestamp("2025-12-31")
+    start_date = end_date - pd.DateOffset(years=years)
+
+    dp = SyntheticDataProvider()
+    tickers = dict(GEM_TICKERS)
+    tickers.update(dp.make_tickers(max(n_symbols - len(GEM_TICKERS), 0)))
+    symbols = list(tickers.values())
+
+    raw = dp._fetch_raw(symbols, start_date, end_date)
+    prices = dp.get_closes(tickers, start_date, end_date)
+    lookup_dates = pd.date_range(start_date + pd.DateOffset(months=1), end_date, periods=100)
+
+    strat = GemStrategy(GEM_CONFIG)
+    current_prices = dp.get_price_at_date(prices, end_date)
+    prev_prices = dp.get_price_at_date(prices, end_date - pd.DateOffset(months=12))
+    decision = strat.calculate_decision(current_prices, prev_prices)
+
+    reporter = Reporter(output_dir=tempfile.gettempdir())
+    report = reporter.generate_report_content(decision, end_date, GEM_TICKERS)
+    # Larger sizes render proportionally longer documents (e.g. backfill digests)
+    document = "\n".join([report] * max(1, n_symbols // 4))
+
+    # Uncached render: EmailSender goes through the content-hash cache
+    renderer = MarkdownRenderer()
+
+    def price_lookups():
+        # Fresh provider: includes building the as-of index once per frame
+        provider = SyntheticDataProvider()
+        for d in lookup_dates:
+            provider.get_price_at_date(prices, d)
+
+    return {
+        "get_closes_normalize": time_call(lambda: dp._extract_closes(raw, symbols), repeat),
+        "get_price_at_date_x100": time_call(price_lookups, repeat),
+        "calculate_decision": time_call(lambda: strat.calculate_decision(current_prices, prev_prices), repeat, number=100),
+        "generate_report_content": time_call(lambda: reporter.generate_report_content(decision, end_date, GEM_TICKERS), repeat, number=100),
+        "render_html": time_call(lambda: renderer.render(document), repeat),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_benchmarks(sizes: List[tuple], repeat: int) -> Dict:
+    results = {}
+    for name, years, n_symbols in sizes:
+        print(f"Benchmarking {name} ({years}y x {n_symbols} symbols)...")
+        results[name] = bench_size(years, n_symbols, repeat)
+
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Prints current vs baseline medians. Returns the list of regressed cases.
+    """
+    regressions = []
+    print(f"\nComparison against {baseline.get('commit')} (threshold {threshold:.0%}):")
+    for size, cases in current["results"].items():
+        for case, timing in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(case)
+            if not base:
+                continue
+            ratio = timing["median"] / base["median"] if base["median"] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{size}/{case}")
+            print(f"  {size:<7} {case:<26} {base['median'] * 1000:10.3f} ms -> {timing['median'] * 1000:10.3f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the GEM pipeline stages.")
+    parser.add_argument("--sizes", nargs="*", default=[s[0] for s in SIZES], help="Subset of sizes to run.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-dir", default="app/data/benchmarks", help="Results are saved as <commit>.json here.")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a case counts as regression.")
+    args = parser.parse_args()
+
+    # Read the baseline first: it may be the file this run is about to overwrite
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    sizes = [s for s in SIZES if s[0] in args.sizes]
+    current = run_benchmarks(sizes, args.repeat)
+
+    for size, cases in current["results"].items():
+        for case, timing in cases.items():
+            print(f"  {size:<7} {case:<26} {timing['median'] * 1000:10.3f} ms (min {timing['min'] * 1000:.3f} ms)")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{current['commit']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"Saved results to {path}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,64 @@
-import yfinance as yf
+import os
+import random
+import threading
+import time
 import pandas as pd
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from as_of_index import AsOfIndex
+from fetch_transport import YFinanceTransport, make_transport
+from market_calendar import MarketCalendar
+from price_matrix import PriceMatrix
+from price_store import PriceStore
 
 class DataProvider:
-    def __init__(self):
-        pass
+    def __init__(self, store: Optional[PriceStore] = None, transport=None, chunk_size: int = 20,
+                 max_workers: int = 4, max_retries: int = 3, backoff_seconds: float = 1.0,
+                 matrix: Optional[PriceMatrix] = None):
+        # Optional memory-mapped snapshot (see price_matrix.py). Requests it fully
+        # covers are served from it without touching the store or the network.
+        self.matrix = matrix
+        # Optional local price store. When set, get_closes reads from disk first
+        # and only downloads the date ranges that are still missing per symbol.
+        self.store = store
+        # Pluggable download backend (see fetch_transport.py)
+        self.transport = transport or YFinanceTransport()
+        # Symbols are downloaded in chunks, chunks run concurrently and each
+        # chunk is retried with jittered exponential backoff
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # Fetch counters for instrumentation. bytes is the in-memory size of the
+        # downloaded frames (yfinance does not expose the raw payload size).
+        self.stats = {"requests": 0, "rows": 0, "bytes": 0, "retries": 0, "store_rows": 0, "matrix_rows": 0, "failed_symbols": []}
+        self._stats_lock = threading.Lock()
+        # As-of index of the last frame passed to get_price_at_date (built once per frame)
+        self._as_of_frame = None
+        self._as_of_index = None
 
-    def get_closes(self, tickers: Dict[str, str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+    @classmethod
+    def from_config(cls, config: Dict) -> "DataProvider":
+        """
+        Builds a DataProvider from the 'data' section of config.yaml.
+        """
+        data_config = config.get('data', {})
+        fetch_config = data_config.get('fetch', {})
+        store_path = data_config.get('store_path')
+        matrix_path = data_config.get('matrix_path')
+        return cls(
+            store=PriceStore(store_path) if store_path else None,
+            transport=make_transport(fetch_config),
+            chunk_size=fetch_config.get('chunk_size', 20),
+            max_workers=fetch_config.get('max_workers', 4),
+            max_retries=fetch_config.get('max_retries', 3),
+            backoff_seconds=fetch_config.get('backoff_seconds', 1.0),
+            matrix=PriceMatrix.open(matrix_path) if matrix_path and os.path.isfile(matrix_path) else None,
+        )
+
+    def get_closes(self, tickers: Dict[str, str], start_date: pd.Timestamp, end_date: pd.Timestamp,
+                   allow_partial: bool = False) -> pd.DataFrame:
         """
         Fetches adjusted close prices for the given list of tickers between start_date and end_date.
         
@@ -14,23 +66,220 @@ class DataProvider:
             tickers: Dictionary of ticker symbols (e.g. {'US': 'SPY', ...})
             start_date: Start date for data fetch.
             end_date: End date for data fetch.
+            allow_partial: Return the frame even when some tickers have no data (their columns
+                           are NaN or absent, with a warning) instead of raising. For callers
+                           that check the columns themselves, e.g. through DataQualityValidator.
             
         Returns:
             pd.DataFrame: DataFrame containing Adjusted Close prices. 
                           Columns are the keys from the tickers dict (e.g. 'US', 'EXUS').
+
+        Raises:
+            ValueError: No data at all, or no data for some tickers without allow_partial.
         """
         symbols = list(tickers.values())
+
+        if self.matrix is not None and self.matrix.covers(symbols, start_date, end_date):
+            # float32 view of the mapped file, columns already renamed to keys
+            closes = self.matrix.to_frame(start_date, end_date, keys=tickers)
+            self.stats["matrix_rows"] += len(closes)
+            return self._check_complete(closes, tickers, allow_partial)
+
+        if self.store is not None:
+            self._sync_store(symbols, start_date, end_date)
+            closes = self.store.read(symbols, start_date, end_date)
+            self.stats["store_rows"] += len(closes)
+            if closes.dropna(how='all').empty:
+                raise ValueError("No data available in the local price store.")
+        else:
+            closes = self._download_closes(symbols, start_date, end_date)
+
+        # Rename columns from Symbols to Keys (SPY -> US)
+        # Invert the dictionary to map Symbol -> Key
+        symbol_to_key = {v: k for k, v in tickers.items()}
         
-        print(f"Fetching data for {symbols} from {start_date.date()} to {end_date.date()}...")
+        # Filter only columns we requested (in case yfinance returns more or we need to be strict)
+        # Also renames them
+        closes = closes.rename(columns=symbol_to_key)
         
-        # Download data
-        # auto_adjust=True ensures we get data adjusted for splits and dividends
-        # threads=False to be safer in some CI environments, though usually fine
-        df = yf.download(symbols, start=start_date, end=end_date + pd.Timedelta(days=1), auto_adjust=True, progress=False, threads=False)
+        # Sort by date just in case
+        closes = closes.sort_index()
         
-        if df.empty:
+        return self._check_complete(closes, tickers, allow_partial)
+
+    @staticmethod
+    def _check_complete(closes: pd.DataFrame, tickers: Dict[str, str], allow_partial: bool) -> pd.DataFrame:
+        """
+        Raises (or warns, with allow_partial) when requested tickers have no data in the frame.
+        """
+        missing = [key for key in tickers if key not in closes.columns or closes[key].isna().all()]
+        if missing:
+            message = f"No data for {', '.join(f'{key} ({tickers[key]})' for key in missing)}"
+            if not allow_partial:
+                raise ValueError(f"{message}.")
+            print(f"Warning: {message}, continuing with partial data.")
+        return closes
+
+    def _sync_store(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp):
+        """
+        Downloads only the date ranges missing from the local store and merges them in.
+        Symbols that miss the same range are fetched together in one request.
+
+        Stored closes are back-adjusted, and a dividend or split after they were
+        stored changes all of them by one factor. Every fetch therefore also asks
+        for the stored bar next to the missing range (the overlap bar); when the
+        fresh close differs, the symbol's stored history is rescaled to match.
+        """
+        # Today's bar may still be incomplete, so coverage never extends past yesterday.
+        # The bar itself is stored and simply overwritten on the next fetch.
+        last_complete_day = pd.Timestamp.today().normalize() - pd.Timedelta(days=1)
+
+        # (fetch start, fetch end, missing start, missing end) -> symbols; overlap bar per symbol
+        fetches: Dict[tuple, List[str]] = {}
+        overlaps: Dict[Tuple[str, pd.Timestamp], pd.Timestamp] = {}
+        for symbol in symbols:
+            coverage = self.store.get_coverage(symbol)
+            for range_start, range_end in self.store.missing_ranges(symbol, start_date, end_date):
+                if not self._has_sessions(range_start, range_end):
+                    # Weekends/holidays only: nothing to fetch, mark as covered
+                    if range_start <= min(range_end, last_complete_day):
+                        self.store.write(symbol, pd.Series(dtype=float), range_start, min(range_end, last_complete_day))
+                    continue
+
+                fetch_start, fetch_end = range_start, range_end
+                if coverage is not None:
+                    overlap = (self.store.last_bar(symbol, coverage[1]) if range_start > coverage[1]
+                               else self.store.first_bar(symbol))
+                    if overlap is not None:
+                        overlaps[(symbol, range_start)] = overlap[0]
+                        fetch_start, fetch_end = min(fetch_start, overlap[0]), max(fetch_end, overlap[0])
+                fetches.setdefault((fetch_start, fetch_end, range_start, range_end), []).append(symbol)
+
+        if not fetches:
+            print(f"All data for {symbols} served from local store ({self.store.path}).")
+            return
+
+        for (fetch_start, fetch_end, range_start, range_end), range_symbols in fetches.items():
+            try:
+                closes = self._download_closes(range_symbols, fetch_start, fetch_end)
+            except ValueError as e:
+                print(f"Warning: fetch for {range_symbols} in {range_start.date()} - {range_end.date()} failed: {e}")
+                continue
+
+            for symbol in range_symbols:
+                if symbol not in closes.columns or closes[symbol].dropna().empty:
+                    # Nothing came back (e.g. transient Yahoo error or dates before listing);
+                    # leave coverage untouched so the range is retried next time.
+                    print(f"Warning: no data returned for {symbol} in {range_start.date()} - {range_end.date()}.")
+                    continue
+                fresh = closes[symbol].dropna()
+                overlap_date = overlaps.get((symbol, range_start))
+                if overlap_date is not None and overlap_date in fresh.index:
+                    # Read now: an earlier range of this symbol may already have rescaled it
+                    stored_close = self.store.last_bar(symbol, overlap_date)[1]
+                    if stored_close:
+                        factor = fresh[overlap_date] / stored_close
+                        if abs(factor - 1) > 1e-6:
+                            print(f"Adjustment of {symbol} changed (x{factor:.6f} at {overlap_date.date()}), rescaling stored history.")
+                            self.store.rescale(symbol, factor)
+                self.store.write(symbol, fresh, range_start, min(range_end, last_complete_day))
+
+    @staticmethod
+    def _has_sessions(start_date: pd.Timestamp, end_date: pd.Timestamp) -> bool:
+        try:
+            return len(MarketCalendar.sessions(start_date, end_date)) > 0
+        except ValueError:
+            # Outside the calendar table: let the fetch decide
+            return True
+
+    def _download_closes(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        """
+        Downloads adjusted close prices, chunked and concurrent.
+
+        Symbols that still fail after all retries are left out of the result
+        (and listed in stats['failed_symbols']); only a fetch with no data at
+        all raises.
+
+        Returns:
+            pd.DataFrame: Close prices with one column per symbol (not renamed to keys).
+        """
+        print(f"Fetching data for {symbols} from {start_date.date()} to {end_date.date()}...")
+
+        chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+        if len(chunks) == 1:
+            results = [self._download_chunk(chunks[0], start_date, end_date)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                results = list(pool.map(lambda chunk: self._download_chunk(chunk, start_date, end_date), chunks))
+
+        frames = [closes for closes, _ in results if not closes.empty]
+        failed = [symbol for _, missing in results for symbol in missing]
+        if failed:
+            print(f"Warning: no data for {failed} after {self.max_retries} retries.")
+            self.stats["failed_symbols"].extend(failed)
+
+        if not frames:
             raise ValueError("No data fetched from Yahoo Finance.")
 
+        closes = pd.concat(frames, axis=1).sort_index()
+        # Keep the requested column order
+        return closes[[s for s in symbols if s in closes.columns]]
+
+    def _download_chunk(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Downloads one chunk, retrying only the symbols that are still missing.
+
+        Returns:
+            Tuple of (closes for the symbols that succeeded, symbols that failed).
+        """
+        pending = list(symbols)
+        collected = []
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                # Exponential backoff with jitter so concurrent chunks do not retry in lockstep
+                delay = self.backoff_seconds * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                time.sleep(delay)
+                self._count("retries", 1)
+
+            try:
+                df = self._fetch_raw(pending, start_date, end_date)
+            except Exception as e:
+                print(f"Warning: fetch attempt {attempt + 1} for {pending} failed: {e}")
+                continue
+
+            self._count("requests", 1)
+            self._count("rows", len(df))
+            self._count("bytes", int(df.memory_usage(deep=True).sum()))
+            if df.empty:
+                continue
+
+            closes = self._extract_closes(df, pending)
+            received = [s for s in pending if s in closes.columns and closes[s].notna().any()]
+            if received:
+                collected.append(closes[received])
+            pending = [s for s in pending if s not in received]
+            if not pending:
+                break
+
+        closes = pd.concat(collected, axis=1) if collected else pd.DataFrame()
+        return closes, pending
+
+    def _count(self, key: str, value: int):
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def _fetch_raw(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        """
+        Raw download through the transport (yfinance-style frame: MultiIndex columns Price x Ticker).
+        Offline stand-ins (see synthetic_data.py) override this method.
+        """
+        return self.transport.download(symbols, start_date, end_date)
+
+    def _extract_closes(self, df: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+        """
+        Extracts the Close column(s) from a raw yfinance response.
+        """
         closes = pd.DataFrame()
 
         # Handle yfinance structure variations
@@ -69,30 +318,27 @@ class DataProvider:
                 available = list(df.columns)
                 raise ValueError(f"Could not find '{target_col}' in response. Columns: {available}")
 
-        # Rename columns from Symbols to Keys (SPY -> US)
-        # Invert the dictionary to map Symbol -> Key
-        symbol_to_key = {v: k for k, v in tickers.items()}
-        
-        # Filter only columns we requested (in case yfinance returns more or we need to be strict)
-        # Also renames them
-        closes = closes.rename(columns=symbol_to_key)
-        
-        # Sort by date just in case
-        closes = closes.sort_index()
-        
         return closes
 
+    def get_as_of_index(self, prices: pd.DataFrame) -> AsOfIndex:
+        """
+        Returns the as-of index for the price frame, reusing it while the same frame is passed.
+        Frames are not expected to be modified in place after they were indexed.
+        """
+        if self._as_of_frame is not prices:
+            self._as_of_index = AsOfIndex(prices)
+            self._as_of_frame = prices
+        return self._as_of_index
+
     def get_price_at_date(self, prices: pd.DataFrame, target_date: pd.Timestamp) -> pd.Series:
         """
         Gets the price at the specific date. If date is missing (e.g. weekend/holiday), 
         looks back to the nearest previous valid trading day.
         """
-        # Filter for dates up to target_date
-        # We assume prices are sorted by date
-        valid_data = prices.loc[:target_date]
-        
-        if valid_data.empty:
-            raise ValueError(f"No data available before or on {target_date}")
-            
-        # Return the last row (nearest valid date)
-        return valid_data.iloc[-1]
+        return self.get_as_of_index(prices).price_at(target_date)
+
+    def get_prices_at_dates(self, prices: pd.DataFrame, dates: List[pd.Timestamp]) -> pd.DataFrame:
+        """
+        Batched get_price_at_date: as-of closes for every date, one row per requested date.
+        """
+        return self.get_as_of_index(prices).prices_at(dates)
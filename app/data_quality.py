@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+from market_calendar import MarketCalendar
+
+SEVERITIES = ["info", "warning", "error"]
+
+class ValidationResult:
+    """
+    Outcome of DataQualityValidator.validate: a list of issues plus per-column statistics.
+    """
+
+    def __init__(self, issues: List[Dict], summary: pd.DataFrame):
+        self.issues = issues
+        self.summary = summary
+
+    @property
+    def max_severity(self) -> Optional[str]:
+        if not self.issues:
+            return None
+        return max((i['severity'] for i in self.issues), key=SEVERITIES.index)
+
+    def count(self, severity: str) -> int:
+        return sum(1 for i in self.issues if i['severity'] == severity)
+
+    def should_fail(self, fail_on: str) -> bool:
+        """
+        True if any issue is at least as severe as fail_on ('never' disables failing).
+        """
+        if fail_on == "never" or not self.issues:
+            return False
+        return SEVERITIES.index(self.max_severity) >= SEVERITIES.index(fail_on)
+
+    def describe(self, min_severity: str = "warning") -> str:
+        """
+        One line per issue at or above min_severity (for logs and exceptions).
+        """
+        level = SEVERITIES.index(min_severity)
+        return "\n".join(
+            f"[{i['severity'].upper()}] {i['check']} {i['column'] or ''}: {i['detail']}".replace("  ", " ")
+            for i in self.issues if SEVERITIES.index(i['severity']) >= level
+        )
+
+class DataQualityValidator:
+    """
+    Vectorized data-quality checks on a daily close matrix, run before the decision.
+
+    The frame is aligned once to the NYSE session calendar up to the analysis
+    date; every check is then a numpy reduction over the (sessions x assets)
+    array, so the cost grows linearly with the matrix and stays small for large
+    universes. Checks:
+      - missing_column: an expected ticker has no data at all
+      - coverage: share of sessions with a bar since the ticker's first bar
+      - gap: longest run of consecutive sessions without a bar
+      - stale: sessions between the ticker's last bar and the analysis date
+      - outlier: daily returns beyond max_abs_return (e.g. an unadjusted split)
+      - lookup_distance: calendar days between each lookup point and the bar
+        the as-of lookup actually uses for that ticker
+      - extra_rows: bars on dates that are not NYSE sessions
+    """
+
+    def __init__(self, max_stale_sessions: int = 2, max_gap_sessions: int = 3, min_coverage: float = 0.98,
+                 max_abs_return: float = 0.25, max_lookup_days: int = 7, severities: Optional[Dict[str, str]] = None):
+        self.max_stale_sessions = max_stale_sessions
+        self.max_gap_sessions = max_gap_sessions
+        self.min_coverage = min_coverage
+        self.max_abs_return = max_abs_return
+        self.max_lookup_days = max_lookup_days
+        self.severities = {
+            "missing_column": "error",
+            "stale": "error",
+            "outlier": "error",
+            "lookup_distance": "error",
+            "gap": "warning",
+            "coverage": "warning",
+            "extra_rows": "info",
+        }
+        self.severities.update(severities or {})
+        for check, severity in self.severities.items():
+            if severity not in SEVERITIES:
+                raise ValueError(f"Unknown severity '{severity}' for check '{check}', expected one of {SEVERITIES}.")
+
+    @classmethod
+    def from_config(cls, validation_config: Dict) -> "DataQualityValidator":
+        return cls(
+            max_stale_sessions=validation_config.get('max_stale_sessions', 2),
+            max_gap_sessions=validation_config.get('max_gap_sessions', 3),
+            min_coverage=validation_config.get('min_coverage', 0.98),
+            max_abs_return=validation_config.get('max_abs_return', 0.25),
+            max_lookup_days=validation_config.get('max_lookup_days', 7),
+            severities=validation_config.get('severities'),
+        )
+
+    def _issue(self, issues: List[Dict], check: str, column: Optional[str], detail: str):
+        issues.append({"check": check, "severity": self.severities[check], "column": column, "detail": detail})
+
+    def validate(self, prices: pd.DataFrame, analysis_date: pd.Timestamp,
+                 point_dates: Optional[Sequence[pd.Timestamp]] = None,
+                 expected_columns: Optional[Sequence[str]] = None) -> ValidationResult:
+        """
+        Runs all checks on prices up to analysis_date.
+
+        Args:
+            prices: Daily closes (DataProvider.get_closes output).
+            analysis_date: The measurement date of the decision.
+            point_dates: Dates the strategy looks prices up at (as-of), checked for distance.
+            expected_columns: Columns that must be present (default: prices.columns).
+        """
+        issues: List[Dict] = []
+        analysis_date = pd.Timestamp(analysis_date)
+        expected = list(expected_columns) if expected_columns is not None else list(prices.columns)
+
+        frame = prices.reindex(columns=expected).loc[:analysis_date]
+        frame = frame[~frame.index.duplicated(keep='last')]
+        if frame.empty:
+            for column in expected:
+                self._issue(issues, "missing_column", column, f"no data on or before {analysis_date.date()}")
+            return ValidationResult(issues, pd.DataFrame(index=expected))
+
+        sessions = MarketCalendar.sessions(frame.index[0], analysis_date)
+        extra = frame.index.difference(sessions)
+        if len(extra):
+            self._issue(issues, "extra_rows", None, f"{len(extra)} bars on non-session dates (first {extra[0].date()})")
+
+        # One (sessions x assets) array; every check below is a reduction over it
+        values = frame.reindex(sessions).to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        n_sessions = len(sessions)
+        rows = np.arange(n_sessions)[:, None]
+
+        # Row of the last bar on or before every session (-1 before the first bar)
+        last_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+        has_any = valid.any(axis=0)
+        first_valid = np.where(has_any, valid.argmax(axis=0), n_sessions)
+
+        present = valid.sum(axis=0)
+        coverage = np.where(has_any, present / np.maximum(n_sessions - first_valid, 1), 0.0)
+        gaps = np.where(valid | (last_valid < 0), 0, rows - last_valid)
+        longest_gap = gaps.max(axis=0)
+        stale = np.where(has_any, n_sessions - 1 - last_valid[-1], n_sessions)
+
+        # Returns between consecutive bars (missing sessions bridged by the previous bar)
+        carried = np.take_along_axis(values, np.clip(last_valid, 0, None), axis=0)
+        carried[last_valid < 0] = np.nan
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = carried[1:] / carried[:-1] - 1
+        outliers = valid[1:] & (np.abs(np.nan_to_num(returns)) > self.max_abs_return)
+        max_abs_return = np.nanmax(np.where(valid[1:], np.abs(returns), np.nan), axis=0, initial=0.0)
+
+        for j, column in enumerate(expected):
+            if not has_any[j]:
+                self._issue(issues, "missing_column", column, "no data in the fetched range")
+                continue
+            if stale[j] > self.max_stale_sessions:
+                last_bar = sessions[last_valid[-1, j]].date()
+                self._issue(issues, "stale", column, f"last bar {last_bar} is {stale[j]} sessions before {analysis_date.date()}")
+            if longest_gap[j] > self.max_gap_sessions:
+                self._issue(issues, "gap", column, f"{longest_gap[j]} consecutive sessions without a bar")
+            if coverage[j] < self.min_coverage:
+                self._issue(issues, "coverage", column, f"bars on {coverage[j]:.1%} of sessions")
+            outlier_rows = np.flatnonzero(outliers[:, j])
+            if len(outlier_rows):
+                first = outlier_rows[0]
+                self._issue(issues, "outlier", column,
+                            f"{len(outlier_rows)} daily moves beyond ±{self.max_abs_return:.0%} "
+                            f"(first {sessions[first + 1].date()}: {returns[first, j]:+.1%})")
+
+        lookup_days = np.full(len(expected), np.nan)
+        if point_dates is not None and len(point_dates):
+            points = pd.DatetimeIndex(pd.to_datetime(list(point_dates)))
+            positions = np.searchsorted(sessions.as_unit('ns').asi8, points.as_unit('ns').asi8, side='right') - 1
+            used = np.where(positions[:, None] >= 0, last_valid[np.clip(positions, 0, None)], -1)
+            session_days = sessions.to_numpy().astype('datetime64[D]').astype(np.int64)
+            point_days = points.to_numpy().astype('datetime64[D]').astype(np.int64)
+            distance = np.where(used >= 0, point_days[:, None] - session_days[np.clip(used, 0, None)], np.inf)
+            lookup_days = np.where(has_any, distance.max(axis=0), np.nan)
+            for j, column in enumerate(expected):
+                if not has_any[j]:
+                    continue
+                worst = int(distance[:, j].argmax())
+                if distance[worst, j] > self.max_lookup_days:
+                    detail = ("no bar on or before" if np.isinf(distance[worst, j])
+                              else f"bar used is {int(distance[worst, j])} days before")
+                    self._issue(issues, "lookup_distance", column, f"{detail} lookup date {points[worst].date()}")
+
+        summary = pd.DataFrame({
+            "coverage": coverage,
+            "longest_gap": longest_gap,
+            "stale_sessions": stale,
+            "max_abs_return": max_abs_return,
+            "max_lookup_days": lookup_days,
+        }, index=expected)
+        return ValidationResult(issues, summary)
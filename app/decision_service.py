@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import time
+import urllib.parse
+import yaml
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from as_of_index import AsOfIndex
+from data_provider import DataProvider
+from market_calendar import MarketCalendar
+from strategy_gem import GemStrategy
+
+class DecisionCache:
+    """
+    LRU-bounded cache of serialized responses.
+
+    Values are the JSON bytes sent to clients, so a hit costs one dict lookup
+    and no serialization.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value: bytes):
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+class DecisionService:
+    """
+    Keeps prices and decisions warm in memory and answers decision queries.
+
+    One close matrix holds the union of the symbols of every universe (config
+    tickers plus sweep universes) with an as-of index built once per refresh.
+    A query (date, lookback, universe) takes the as-of closes one month apart
+    from that index and runs the GEM rule; the JSON answer is kept in a
+    DecisionCache, so repeated queries are served without recomputing.
+    fetch_update() fetches only the bars after the last one held (through
+    the price store); apply_update() swaps them in and clears the cache.
+    """
+
+    def __init__(self, config: Dict, history_start: str = "2005-01-01", cache_size: int = 4096,
+                 provider: Optional[DataProvider] = None):
+        self.config = config
+        self.history_start = pd.Timestamp(history_start)
+        self.cache = DecisionCache(cache_size)
+        self.provider = provider or DataProvider.from_config(config)
+
+        self.universes = {"default": dict(config['tickers'])}
+        for name, tickers in config.get('sweep', {}).get('universes', {}).items():
+            self.universes.setdefault(name, dict(tickers))
+        self.symbols = list(dict.fromkeys(s for tickers in self.universes.values() for s in tickers.values()))
+
+        self.prices: Optional[pd.DataFrame] = None
+        self.index: Optional[AsOfIndex] = None
+        self.refreshed_at: Optional[float] = None
+        self._strategies: Dict[Tuple[str, Optional[int]], GemStrategy] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def fetch_update(self) -> Optional[pd.DataFrame]:
+        """
+        Fetches the full history on the first call, afterwards only the bars since the last one held
+        (the last held bar is fetched again, since it may have been incomplete).
+
+        Only reads self.prices, so it can run in a worker thread while queries are served.
+
+        Returns:
+            The updated close matrix, or None when nothing changed.
+        """
+        today = pd.Timestamp.today().normalize()
+        symbol_map = {s: s for s in self.symbols}
+        current = self.prices
+        if current is None:
+            # A failed symbol only affects the universes using it (decision() rejects NaN prices)
+            return self.provider.get_closes(symbol_map, self.history_start, today,
+                                            allow_partial=True).reindex(columns=self.symbols)
+
+        last = current.index[-1]
+        fresh = self.provider.get_closes(symbol_map, last, today, allow_partial=True)
+        fresh = fresh.reindex(columns=self.symbols).dropna(how='all')
+        # Fetched closes win; a symbol missing from the fetch keeps the closes already held
+        merged = fresh.combine_first(current).reindex(columns=self.symbols)
+        new_rows = merged.index.difference(current.index)
+        last_changed = not merged.loc[[last]].equals(current.loc[[last]])
+        if len(new_rows) == 0 and not last_changed:
+            return None
+        return merged
+
+    def apply_update(self, prices: Optional[pd.DataFrame]) -> int:
+        """
+        Swaps in a close matrix from fetch_update, rebuilds the as-of index and clears the cache.
+
+        Returns:
+            Number of rows added (0 when prices is None).
+        """
+        self.refreshed_at = time.time()
+        if prices is None:
+            return 0
+        added = len(prices) - (0 if self.prices is None else len(self.prices))
+        self.index = AsOfIndex(prices)
+        self.prices = prices
+        self._columns = {
+            name: np.array([self.symbols.index(s) for s in tickers.values()]) for name, tickers in self.universes.items()
+        }
+        self.cache.clear()
+        return max(added, 1)
+
+    def refresh(self) -> int:
+        return self.apply_update(self.fetch_update())
+
+    def _strategy(self, universe: str, lookback: Optional[int]) -> GemStrategy:
+        key = (universe, lookback)
+        if key not in self._strategies:
+            strategy_config = dict(self.config['strategy'])
+            if lookback is not None:
+                # An explicit lookback replaces any configured horizons
+                strategy_config.pop('horizons', None)
+                strategy_config['lookback_months'] = lookback
+            self._strategies[key] = GemStrategy({'tickers': self.universes[universe], 'strategy': strategy_config})
+        return self._strategies[key]
+
+    def decision(self, date: Optional[str] = None, lookback: Optional[int] = None, universe: str = "default") -> bytes:
+        """
+        JSON decision for the last session on or before date (default: latest bar held).
+
+        Raises:
+            ValueError: Unknown universe, bad parameters or not enough history.
+        """
+        # Repeat queries hit on the raw parameters, before any date parsing
+        request_key = (date, lookback, universe)
+        cached = self.cache.get(request_key)
+        if cached is not None:
+            return cached
+
+        if self.index is None:
+            raise ValueError("Prices are not loaded yet.")
+        if universe not in self.universes:
+            raise ValueError(f"Unknown universe '{universe}', expected one of {sorted(self.universes)}.")
+        if lookback is not None and not 1 <= lookback <= 240:
+            raise ValueError("lookback must be between 1 and 240 months.")
+
+        target = pd.Timestamp(date) if date else self.index.index[-1]
+        position = int(self.index.locate([target])[0])
+        if position < 0:
+            raise ValueError(f"No prices on or before {target.date()}.")
+        analysis_date = self.index.index[position]
+
+        # Different dates resolving to the same session share one entry
+        key = (analysis_date, lookback, universe)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.put(request_key, cached)
+            return cached
+
+        strategy = self._strategy(universe, lookback)
+        max_months = strategy.momentum.max_months
+        points = MarketCalendar.month_end_points(analysis_date, max_months)
+        positions = self.index.locate(points)
+        if positions[0] < 0:
+            raise ValueError(f"Not enough history for a {max_months}-month lookback at {analysis_date.date()}.")
+
+        tickers = self.universes[universe]
+        monthly_prices = pd.DataFrame(self.index.values[np.ix_(positions, self._columns[universe])],
+                                      index=points, columns=list(tickers))
+        if monthly_prices.isna().any().any():
+            raise ValueError(f"Missing prices for universe '{universe}' at {analysis_date.date()}.")
+        decision = strategy.calculate_decision_from_history(monthly_prices)
+
+        body = json.dumps({
+            "analysis_date": analysis_date.strftime('%Y-%m-%d'),
+            "universe": universe,
+            "lookback_months": lookback if lookback is not None else max_months,
+            "mode": decision['mode'],
+            "selected_asset": decision['selected_asset_key'],
+            "ticker": decision['selected_ticker'],
+            "momentum": {k: float(v) for k, v in decision['momentum'].items()},
+            "momentum_label": decision['momentum_label'],
+            "components": {label: {k: float(v) for k, v in values.items()}
+                           for label, values in decision['components'].items()},
+        }).encode("utf-8")
+        self.cache.put(key, body)
+        self.cache.put(request_key, body)
+        return body
+
+    def health(self) -> bytes:
+        return json.dumps({
+            "status": "ok" if self.index is not None else "loading",
+            "last_bar": self.index.index[-1].strftime('%Y-%m-%d') if self.index is not None else None,
+            "rows": 0 if self.prices is None else len(self.prices),
+            "symbols": len(self.symbols),
+            "universes": sorted(self.universes),
+            "refreshed_at": self.refreshed_at,
+            "cache": self.cache.stats(),
+        }).encode("utf-8")
+
+class DecisionServer:
+    """
+    Minimal asyncio HTTP/1.1 front end (GET only, keep-alive) for a DecisionService.
+
+    Routes:
+      GET /decision?date=YYYY-MM-DD&lookback=12&universe=default  (all optional)
+      GET /health
+    """
+
+    def __init__(self, service: DecisionService, host: str = "127.0.0.1", port: int = 8780, refresh_seconds: float = 900):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.refresh_seconds = refresh_seconds
+        self._server = None
+
+    async def _refresh_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                # Fetching blocks, so it runs in the executor while requests keep being served;
+                # the swap happens on the loop, so no query mixes old and new data
+                prices = await loop.run_in_executor(None, self.service.fetch_update)
+                changed = self.service.apply_update(prices)
+                if changed:
+                    print(f"Refreshed prices: {changed} new rows, cache cleared.")
+            except Exception as e:
+                print(f"Warning: price refresh failed: {e}")
+
+    def _route(self, target: str) -> Tuple[int, bytes]:
+        parsed = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        if parsed.path == "/health":
+            return 200, self.service.health()
+        if parsed.path == "/decision":
+            try:
+                lookback = int(query['lookback']) if 'lookback' in query else None
+                return 200, self.service.decision(query.get('date'), lookback, query.get('universe', 'default'))
+            except ValueError as e:
+                return 400, json.dumps({"error": str(e)}).encode("utf-8")
+        return 404, json.dumps({"error": f"Unknown path {parsed.path}"}).encode("utf-8")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                        keep_alive = False
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3 or parts[0] != "GET":
+                    status, body = 405, b'{"error": "Only GET is supported"}'
+                    keep_alive = False
+                else:
+                    status, body = self._route(parts[1])
+                    keep_alive = keep_alive and parts[2] == "HTTP/1.1"
+
+                reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        if self.service.index is None:
+            self.service.apply_update(await loop.run_in_executor(None, self.service.fetch_update))
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        print(f"Decision service on http://{host}:{port} ({len(self.service.prices)} rows, "
+              f"{len(self.service.symbols)} symbols, refresh every {self.refresh_seconds:.0f}s)")
+
+        refresh_task = asyncio.create_task(self._refresh_loop())
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            refresh_task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running GEM decision service (HTTP, JSON).")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    service_config = config.get('service', {})
+
+    # Warm the trading calendar once, before serving
+    MarketCalendar.get_session_days()
+    service = DecisionService(config, history_start=service_config.get('history_start', '2005-01-01'),
+                              cache_size=service_config.get('cache_size', 4096))
+    server = DecisionServer(service, host=args.host or service_config.get('host', '127.0.0.1'),
+                            port=args.port or service_config.get('port', 8780),
+                            refresh_seconds=service_config.get('refresh_minutes', 15) * 60)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
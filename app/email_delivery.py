@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import sqlite3
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+class DeliveryError(Exception):
+    """
+    A batch request the provider rejected. retryable is True for 429/5xx and network errors.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status == 429 or self.status >= 500
+
+class ResendBatchClient:
+    """
+    Blocking client for Resend's batch endpoint (POST /emails/batch, up to 100 emails).
+
+    Keeps a pool of persistent HTTP connections, so consecutive batches reuse
+    the same TCP/TLS sessions instead of reconnecting. base_url can point at the
+    local stand-in server (see fake_resend.py).
+    """
+
+    def __init__(self, api_key: str, base_url: str = "https://api.resend.com", pool_size: int = 2, timeout: float = 30.0):
+        parsed = urllib.parse.urlparse(base_url)
+        self.api_key = api_key
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.https = parsed.scheme == "https"
+        self.path = parsed.path.rstrip('/') + "/emails/batch"
+        self.timeout = timeout
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(None)  # connections are opened lazily
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def send_batch(self, emails: List[Dict], idempotency_key: str) -> List[str]:
+        """
+        Sends one batch and returns the provider message ids (same order as emails).
+
+        Raises:
+            DeliveryError: On HTTP errors or connection failures.
+        """
+        body = json.dumps(emails).encode("utf-8")
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Idempotency-Key": idempotency_key,
+            "User-Agent": "GEM ETF Decision App",
+        }
+
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            try:
+                conn.request("POST", self.path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Drop the broken connection; the next request reconnects
+                conn.close()
+                conn = None
+                raise DeliveryError(f"connection error: {e}") from e
+        finally:
+            self._pool.put(conn)
+
+        if response.status >= 400:
+            retry_after = response.getheader("Retry-After")
+            raise DeliveryError(
+                f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}",
+                status=response.status,
+                retry_after=float(retry_after) if retry_after else None,
+            )
+        data = json.loads(payload.decode("utf-8")).get("data", [])
+        return [item.get("id") for item in data]
+
+    def close(self):
+        while not self._pool.empty():
+            conn = self._pool.get_nowait()
+            if conn is not None:
+                conn.close()
+
+class RateLimiter:
+    """
+    Spaces request starts at least 1 / rate_per_second apart across all tasks.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class DeliveryLog:
+    """
+    Per-recipient delivery status (SQLite), one row per (campaign, recipient).
+
+    Re-running a campaign skips recipients already marked 'sent', so a crash or
+    a partial failure can be resumed without double-sending.
+    """
+
+    def __init__(self, path: str = "app/data/deliveries.sqlite"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries ("
+            " campaign TEXT NOT NULL, recipient TEXT NOT NULL, status TEXT NOT NULL,"
+            " message_id TEXT, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated TEXT NOT NULL,"
+            " PRIMARY KEY (campaign, recipient))"
+        )
+        self.conn.commit()
+
+    def sent(self, campaign: str) -> Set[str]:
+        rows = self.conn.execute("SELECT recipient FROM deliveries WHERE campaign = ? AND status = 'sent'", (campaign,))
+        return {row[0] for row in rows}
+
+    def record(self, campaign: str, results: List[Dict]):
+        now = datetime.now().isoformat(sep=' ')
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO deliveries (campaign, recipient, status, message_id, attempts, error, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(campaign, recipient) DO UPDATE SET status = excluded.status,"
+                " message_id = excluded.message_id, attempts = deliveries.attempts + excluded.attempts,"
+                " error = excluded.error, updated = excluded.updated",
+                [(campaign, r['recipient'], r['status'], r.get('message_id'), r['attempts'], r.get('error'), now) for r in results]
+            )
+
+    def summary(self, campaign: str) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM deliveries WHERE campaign = ? GROUP BY status", (campaign,))
+        return dict(rows.fetchall())
+
+    def close(self):
+        self.conn.close()
+
+def build_messages(recipients: List, sender: str, subject: str, content: str, render_html: Callable[[str], str],
+                   personalize: Optional[Callable[[Dict], Dict]] = None) -> List[Dict]:
+    """
+    One Resend email object per recipient.
+
+    Args:
+        recipients: Addresses, or dicts with 'email' plus any fields used by personalize.
+        personalize: Optional callable(recipient) returning {'subject': ..., 'content': ...}
+                     overrides for a personalized report variant.
+        render_html: Markdown -> HTML renderer; identical variants hit its cache.
+    """
+    messages = []
+    for recipient in recipients:
+        recipient = recipient if isinstance(recipient, dict) else {"email": recipient}
+        variant = personalize(recipient) if personalize else {}
+        text = variant.get('content', content)
+        messages.append({
+            "from": sender,
+            "to": [recipient['email']],
+            "subject": variant.get('subject', subject),
+            "text": text,
+            "html": render_html(text),
+        })
+    return messages
+
+class AsyncDelivery:
+    """
+    Delivers many emails through provider batch requests.
+
+    Messages are grouped into batches of batch_size and sent by up to
+    max_concurrency tasks sharing one connection pool and one rate limiter.
+    Every batch carries an idempotency key derived from its content, so a
+    retried (or re-run) batch is not delivered twice. Retryable failures back
+    off exponentially (honouring Retry-After); the outcome of every recipient
+    is written to the DeliveryLog.
+    """
+
+    def __init__(self, client: ResendBatchClient, log: DeliveryLog, batch_size: int = 100, max_concurrency: int = 2,
+                 rate_per_second: float = 2.0, max_retries: int = 3, backoff_seconds: float = 1.0):
+        self.client = client
+        self.log = log
+        self.batch_size = min(batch_size, 100)  # provider limit
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    @staticmethod
+    def idempotency_key(campaign: str, batch: List[Dict]) -> str:
+        digest = hashlib.sha256(campaign.encode("utf-8"))
+        for message in batch:
+            digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+        return f"gem-{digest.hexdigest()[:48]}"
+
+    def deliver(self, campaign: str, messages: List[Dict]) -> Dict[str, int]:
+        """
+        Sends messages (skipping recipients already sent in this campaign).
+
+        Returns:
+            Status counts for the campaign, e.g. {'sent': 998, 'failed': 2}.
+        """
+        return asyncio.run(self._deliver(campaign, messages))
+
+    async def _deliver(self, campaign: str, messages: List[Dict]) -> Dict[str, int]:
+        done = self.log.sent(campaign)
+        pending = [m for m in messages if m['to'][0] not in done]
+        if len(pending) < len(messages):
+            print(f"Skipping {len(messages) - len(pending)} recipients already sent for {campaign}.")
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        limiter = RateLimiter(self.rate_per_second)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                results = await self._send_with_retry(campaign, batch, limiter)
+            self.log.record(campaign, results)
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+        return self.log.summary(campaign)
+
+    async def _send_with_retry(self, campaign: str, batch: List[Dict], limiter: RateLimiter) -> List[Dict]:
+        key = self.idempotency_key(campaign, batch)
+        loop = asyncio.get_running_loop()
+        recipients = [m['to'][0] for m in batch]
+
+        for attempt in range(1, self.max_retries + 2):
+            await limiter.acquire()
+            try:
+                ids = await loop.run_in_executor(None, self.client.send_batch, batch, key)
+                return [{"recipient": r, "status": "sent", "message_id": i, "attempts": attempt}
+                        for r, i in zip(recipients, ids + [None] * (len(recipients) - len(ids)))]
+            except DeliveryError as e:
+                if not e.retryable or attempt > self.max_retries:
+                    print(f"Batch of {len(batch)} failed after {attempt} attempt(s): {e}")
+                    return [{"recipient": r, "status": "failed", "attempts": attempt, "error": str(e)} for r in recipients]
+                delay = e.retry_after or self.backoff_seconds * (2 ** (attempt - 1)) * (0.5 + random.random())
+                print(f"Batch of {len(batch)} failed ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
@@ -0,0 +1,132 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+class FakeResendServer:
+    """
+    Local stand-in for Resend's email API (POST /emails and /emails/batch).
+
+    Accepted emails are kept in `sent` instead of being delivered. Batches
+    repeated with the same Idempotency-Key return the original ids without
+    storing the emails again, like the real API. Failures can be injected:
+      - latency: seconds added to every response
+      - error_rate: probability of answering 500/429 instead of accepting
+      - max_batch: larger batches are rejected with 422
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, api_key: str = "re_test", latency: float = 0.0,
+                 error_rate: float = 0.0, max_batch: int = 100, seed: int = 0):
+        self.api_key = api_key
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_batch = max_batch
+        self.random = random.Random(seed)
+        self.sent: List[Dict] = []
+        self.request_count = 0
+        self.error_count = 0
+        self._idempotent: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeResendServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        length = int(request.headers.get("Content-Length", 0))
+        body = request.rfile.read(length)
+        if self.latency:
+            time.sleep(self.latency)
+
+        if request.headers.get("Authorization") != f"Bearer {self.api_key}":
+            return self._send(request, 401, {"name": "missing_api_key", "message": "Invalid API key"})
+        if request.path not in ("/emails", "/emails/batch"):
+            return self._send(request, 404, {"name": "not_found", "message": request.path})
+
+        with self._lock:
+            self.request_count += 1
+            if self.random.random() < self.error_rate:
+                self.error_count += 1
+                status = self.random.choice([429, 500])
+                return self._send(request, status, {"name": "injected_failure", "message": "injected failure"},
+                                  headers={"Retry-After": "0.05"} if status == 429 else None)
+
+        emails = json.loads(body.decode("utf-8"))
+        batch = request.path.endswith("/batch")
+        if not batch:
+            emails = [emails]
+        if len(emails) > self.max_batch:
+            return self._send(request, 422, {"name": "validation_error", "message": f"Batch larger than {self.max_batch}"})
+
+        key = request.headers.get("Idempotency-Key")
+        with self._lock:
+            if key and key in self._idempotent:
+                ids = self._idempotent[key]
+            else:
+                ids = [{"id": str(uuid.uuid4())} for _ in emails]
+                self.sent.extend(dict(email, id=i["id"]) for email, i in zip(emails, ids))
+                if key:
+                    self._idempotent[key] = ids
+
+        self._send(request, 200, {"data": ids} if batch else ids[0])
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload: dict, headers: Dict[str, str] = None):
+        body = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Resend email API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--api-key", default="re_test", help="Expected bearer token (set RESEND_API_KEY to match).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429/500.")
+    args = parser.parse_args()
+
+    server = FakeResendServer(args.host, args.port, args.api_key, args.latency, args.error_rate)
+    print(f"Fake Resend API on {server.url} (set email.delivery.base_url)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Accepted {len(server.sent)} emails in {server.request_count} requests.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+
+from synthetic_data import SyntheticDataProvider
+
+class FakeYahooServer:
+    """
+    Local stand-in for Yahoo's v8 chart endpoint, serving canned synthetic bars.
+
+    Used with the "http" fetch transport to exercise chunking, concurrency and
+    retries offline. Latency and failures can be injected:
+      - latency: seconds added to every response
+      - error_rate: probability of answering 500/429 instead of data
+      - fail_symbols: symbols that always get a 404
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, fail_symbols: Optional[Iterable[str]] = None, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_symbols = set(fail_symbols or [])
+        self.random = random.Random(seed)
+        self.provider = SyntheticDataProvider(seed=seed)
+        self.request_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeYahooServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.error_count += 1
+            return fail
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        if self.latency:
+            time.sleep(self.latency)
+
+        parsed = urllib.parse.urlparse(request.path)
+        prefix = "/v8/finance/chart/"
+        if not parsed.path.startswith(prefix):
+            return self._send(request, 404, {"chart": {"result": None, "error": {"code": "Not Found"}}})
+
+        symbol = urllib.parse.unquote(parsed.path[len(prefix):])
+        if self._should_fail():
+            return self._send(request, self.random.choice([429, 500]), {"error": "injected failure"})
+        if symbol in self.fail_symbols:
+            return self._send(request, 404, {"chart": {"result": None, "error": {"code": "Not Found", "description": f"No data found, symbol may be delisted: {symbol}"}}})
+
+        query = urllib.parse.parse_qs(parsed.query)
+        start = pd.Timestamp(int(query["period1"][0]), unit="s")
+        # period2 is exclusive
+        end = pd.Timestamp(int(query["period2"][0]), unit="s") - pd.Timedelta(days=1)
+        self._send(request, 200, self._chart_payload(symbol, start, end))
+
+    def _chart_payload(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> dict:
+        raw = self.provider._fetch_raw([symbol], start, end)
+        if raw.empty:
+            return {"chart": {"result": [{"meta": {"symbol": symbol}, "indicators": {"quote": [{}]}}], "error": None}}
+
+        closes = raw[("Close", symbol)]
+        # Daily bars are stamped at the 09:30 New York open, like Yahoo does
+        opens = closes.index.tz_localize("America/New_York") + pd.Timedelta(hours=9, minutes=30)
+        return {"chart": {"result": [{
+            "meta": {"symbol": symbol, "currency": "USD", "exchangeTimezoneName": "America/New_York"},
+            "timestamp": [int(ts.timestamp()) for ts in opens],
+            "indicators": {
+                "quote": [{"close": closes.round(6).tolist()}],
+                "adjclose": [{"adjclose": closes.round(6).tolist()}],
+            },
+        }], "error": None}}
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Yahoo chart API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected 429/500.")
+    parser.add_argument("--fail-symbol", action="append", default=[], help="Symbol that always returns 404.")
+    args = parser.parse_args()
+
+    server = FakeYahooServer(args.host, args.port, args.latency, args.error_rate, args.fail_symbol)
+    print(f"Fake Yahoo chart API on {server.url} (set data.fetch.transport: http and base_url)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import urllib.parse
+import urllib.request
+import pandas as pd
+from typing import List
+
+class YFinanceTransport:
+    """
+    Downloads daily bars through the yfinance package, one Ticker per symbol.
+
+    yf.download keeps module-global state between calls and is not safe to run
+    from several threads at once, so concurrent chunks use Ticker.history instead.
+    """
+
+    def download(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        import yfinance as yf
+
+        frames = {}
+        for symbol in symbols:
+            # auto_adjust=True ensures we get data adjusted for splits and dividends
+            history = yf.Ticker(symbol).history(start=start_date, end=end_date + pd.Timedelta(days=1), auto_adjust=True)
+            if history.empty:
+                continue
+            if history.index.tz is not None:
+                history.index = history.index.tz_localize(None)
+            frames[symbol] = history['Close'].rename(symbol)
+        return _to_raw_frame(frames)
+
+class YahooChartTransport:
+    """
+    Minimal HTTP client for Yahoo's v8 chart endpoint.
+
+    base_url can point at a local stand-in server (see fake_yahoo.py) to test
+    latency, errors and retries without touching the network.
+    """
+
+    def __init__(self, base_url: str = "https://query1.finance.yahoo.com", timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _chart_url(self, symbol: str, start_date: pd.Timestamp, end_date: pd.Timestamp) -> str:
+        params = urllib.parse.urlencode({
+            "period1": int(pd.Timestamp(start_date).timestamp()),
+            "period2": int((pd.Timestamp(end_date) + pd.Timedelta(days=1)).timestamp()),
+            "interval": "1d",
+            "events": "div,splits",
+            "includeAdjustedClose": "true",
+        })
+        return f"{self.base_url}/v8/finance/chart/{urllib.parse.quote(symbol)}?{params}"
+
+    def _fetch_symbol(self, symbol: str, start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.Series:
+        request = urllib.request.Request(
+            self._chart_url(symbol, start_date, end_date),
+            headers={"User-Agent": "Mozilla/5.0 (GEM ETF Decision App)"}
+        )
+        # HTTP errors (429, 5xx) raise and are retried by DataProvider
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+
+        result = (payload.get("chart", {}).get("result") or [None])[0]
+        if not result or not result.get("timestamp"):
+            return pd.Series(dtype=float, name=symbol)
+
+        indicators = result["indicators"]
+        # Adjusted close matches yfinance's auto_adjust=True closes
+        if indicators.get("adjclose"):
+            values = indicators["adjclose"][0]["adjclose"]
+        else:
+            values = indicators["quote"][0]["close"]
+
+        timezone = result.get("meta", {}).get("exchangeTimezoneName", "America/New_York")
+        index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(timezone).tz_localize(None).normalize()
+        return pd.Series(values, index=index, name=symbol, dtype=float)
+
+    def download(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        frames = {}
+        for symbol in symbols:
+            # One failing symbol must not discard the rest of the chunk;
+            # missing symbols are retried by DataProvider
+            try:
+                closes = self._fetch_symbol(symbol, start_date, end_date)
+            except (OSError, ValueError) as e:
+                print(f"Warning: request for {symbol} failed: {e}")
+                continue
+            if not closes.dropna().empty:
+                frames[symbol] = closes
+        return _to_raw_frame(frames)
+
+def _to_raw_frame(frames) -> pd.DataFrame:
+    """
+    Builds a yfinance-style frame (MultiIndex columns: Price x Ticker) from per-symbol closes.
+    """
+    if not frames:
+        return pd.DataFrame()
+    closes = pd.concat(frames.values(), axis=1).sort_index()
+    closes.columns = pd.MultiIndex.from_product([["Close"], list(frames.keys())], names=["Price", "Ticker"])
+    closes.index.name = "Date"
+    return closes
+
+def make_transport(fetch_config: dict):
+    """
+    Creates the transport named in config['data']['fetch']['transport'].
+    """
+    name = fetch_config.get('transport', 'yfinance')
+    if name == 'yfinance':
+        return YFinanceTransport()
+    if name == 'http':
+        return YahooChartTransport(base_url=fetch_config.get('base_url', "https://query1.finance.yahoo.com"))
+    raise ValueError(f"Unknown fetch transport '{name}', expected 'yfinance' or 'http'.")
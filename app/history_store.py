@@ -0,0 +1,219 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class HistoryStore:
+    """
+    Decision history keyed by analysis date (SQLite).
+
+    Writes are upserts, so re-running a month replaces its row instead of
+    appending a duplicate. After every write the full history is exported to a
+    CSV file (app/decisions.csv), the human/git readable copy. The hash of the
+    last export is kept in the database: when the CSV no longer matches it
+    (edited by hand, changed by a git pull) or the database is new (e.g. a
+    fresh CI runner), the table is reloaded from the CSV on open, so edits to
+    the committed file are not overwritten by the next export.
+    """
+
+    COLUMNS = [
+        "date", "selected_asset", "ticker", "mode",
+        "momentum_us", "momentum_exus", "momentum_cash", "timestamp",
+        # JSON {horizon: {asset: return}}, only filled for blended momentum
+        "momentum_components"
+    ]
+    FLOAT_COLUMNS = {"momentum_us", "momentum_exus", "momentum_cash"}
+
+    def __init__(self, db_path: str = "app/data/history.sqlite", csv_path: Optional[str] = "app/decisions.csv"):
+        self.db_path = db_path
+        self.csv_path = csv_path
+
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.conn = sqlite3.connect(db_path)
+        # date is the primary key, which doubles as the index for range queries
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                date TEXT PRIMARY KEY,
+                selected_asset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                momentum_us REAL,
+                momentum_exus REAL,
+                momentum_cash REAL,
+                timestamp TEXT,
+                momentum_components TEXT
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate()
+
+        if csv_path and os.path.isfile(csv_path):
+            csv_hash = self._file_hash(csv_path)
+            if self._count() == 0:
+                self._import_csv(csv_path)
+                self._set_meta("csv_hash", csv_hash)
+            elif csv_hash != self._get_meta("csv_hash"):
+                print(f"{csv_path} changed since the last export, reloading history from it.")
+                self._import_csv(csv_path, replace=True)
+                self._set_meta("csv_hash", csv_hash)
+
+    def close(self):
+        self.conn.close()
+
+    def _migrate(self):
+        """
+        Adds columns introduced after the database was created.
+        """
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(decisions)")}
+        with self.conn:
+            for column in self.COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE decisions ADD COLUMN {column} TEXT")
+
+    def _count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _import_csv(self, path: str, replace: bool = False):
+        """
+        Loads the database from a CSV export. Duplicate dates keep the last row.
+
+        Args:
+            replace: Drop rows missing from the CSV (it is the newer copy).
+        """
+        with open(path, newline='', encoding='utf-8') as f:
+            records = list(csv.DictReader(f))
+        if replace:
+            with self.conn:
+                self.conn.execute("DELETE FROM decisions")
+        self._upsert_many(records)
+
+    def _to_row(self, record: Dict) -> tuple:
+        row = []
+        for column in self.COLUMNS:
+            value = record.get(column)
+            if value is None or value == "":
+                row.append(None)
+            elif column in self.FLOAT_COLUMNS:
+                row.append(float(value))
+            else:
+                row.append(str(value))
+        return tuple(row)
+
+    def _upsert_many(self, records: List[Dict]):
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS if c != "date")
+        rows = [self._to_row(r) for r in records]
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO decisions ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(date) DO UPDATE SET {updates}",
+                rows
+            )
+
+    def upsert(self, record: Dict):
+        """
+        Inserts or replaces the decision for record['date'] and refreshes the CSV export.
+        """
+        self._upsert_many([record])
+        if self.csv_path:
+            self.export_csv(self.csv_path)
+
+    def upsert_many(self, records: List[Dict]):
+        """
+        Bulk upsert (e.g. a backfill) in one transaction, with a single CSV export at the end.
+        """
+        self._upsert_many(records)
+        if self.csv_path:
+            self.export_csv(self.csv_path)
+
+    @staticmethod
+    def record_from_decision(decision: Dict, date_point) -> Dict:
+        """
+        Builds the history row for a strategy decision taken at date_point.
+        """
+        record = {
+            "date": date_point.strftime('%Y-%m-%d'),
+            # Custom rotations (strategy.engine) may hold several assets
+            "selected_asset": ",".join(decision.get('selected_assets', [decision['selected_asset_key']])),
+            "ticker": ",".join(decision.get('selected_tickers', [decision['selected_ticker']])),
+            "mode": decision['mode'],
+            # GEM columns; empty when a custom rotation does not use these keys
+            "momentum_us": decision['momentum'].get('US'),
+            "momentum_exus": decision['momentum'].get('EXUS'),
+            "momentum_cash": decision['momentum'].get('CASH_PROXY'),
+            "timestamp": datetime.now().isoformat(sep=' ')
+        }
+        if decision.get('momentum_label') == 'Blend':
+            record["momentum_components"] = json.dumps(
+                {label: {k: float(v) for k, v in values.items()} for label, values in decision['components'].items()}
+            )
+        return record
+
+    def export_csv(self, path: str):
+        """
+        Writes the full history (sorted by date) to CSV, replacing the file atomically.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(self.COLUMNS)
+            for row in self.conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM decisions ORDER BY date"):
+                writer.writerow(["" if v is None else repr(v) if isinstance(v, float) else v for v in row])
+        os.replace(tmp_path, path)
+        if path == self.csv_path:
+            self._set_meta("csv_hash", self._file_hash(path))
+
+    def has_date(self, date_str: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM decisions WHERE date = ?", (date_str,)).fetchone() is not None
+
+    def has_month(self, month_str: str) -> bool:
+        """
+        Checks if there is a decision for the given month (YYYY-MM).
+        """
+        row = self.conn.execute(
+            "SELECT 1 FROM decisions WHERE date BETWEEN ? AND ? LIMIT 1",
+            (f"{month_str}-01", f"{month_str}-31")
+        ).fetchone()
+        return row is not None
+
+    def get(self, date_str: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM decisions WHERE date = ?", (date_str,)
+        ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None):
+        """
+        Reads the decision series between start and end (YYYY-MM-DD, inclusive) using the date index.
+
+        Returns:
+            pd.DataFrame indexed by date (DatetimeIndex).
+        """
+        # pandas is only needed for reads; writes stay lightweight
+        import pandas as pd
+
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM decisions WHERE date BETWEEN ? AND ? ORDER BY date"
+        rows = self.conn.execute(query, (start or "0000-00-00", end or "9999-99-99")).fetchall()
+
+        history = pd.DataFrame(rows, columns=self.COLUMNS)
+        history["date"] = pd.to_datetime(history["date"])
+        return history.set_index("date")
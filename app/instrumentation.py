@@ -0,0 +1,84 @@
+import cProfile
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+class RunTracer:
+    """
+    Structured per-stage instrumentation for a pipeline run.
+
+    Every span records wall and CPU time, its status and any attributes the
+    stage attaches (e.g. rows/bytes fetched, retries), and is appended as one
+    JSON line to the spans file. Stages listed in profile_stages (or "all")
+    additionally run under cProfile and their stats are saved to profile_dir
+    (open with `python -m pstats <file>` or snakeviz).
+    """
+
+    def __init__(self, path: str = "app/logs/spans.jsonl", profile_stages: Optional[Iterable[str]] = None,
+                 profile_dir: str = "app/logs/profiles"):
+        self.path = path
+        self.profile_stages = set(profile_stages or [])
+        self.profile_dir = profile_dir
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.spans = []
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def _should_profile(self, name: str) -> bool:
+        return "all" in self.profile_stages or name in self.profile_stages
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Times the enclosed block. Yields a dict the stage can add attributes to.
+        """
+        record: Dict = {"run_id": self.run_id, "stage": name, "start": datetime.now().isoformat()}
+        record.update(attributes)
+
+        profiler = cProfile.Profile() if self._should_profile(name) else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler:
+            profiler.enable()
+
+        try:
+            yield record
+            record["status"] = "ok"
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+                record["profile"] = self._save_profile(profiler, name)
+            record["wall_s"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 6)
+            self.spans.append(record)
+            self._write(record)
+
+    def _save_profile(self, profiler: cProfile.Profile, name: str) -> str:
+        if not os.path.exists(self.profile_dir):
+            os.makedirs(self.profile_dir)
+        path = os.path.join(self.profile_dir, f"{self.run_id}_{name}.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def _write(self, record: Dict):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def summary(self) -> str:
+        """
+        One line per span, for the log.
+        """
+        return "\n".join(
+            f"  {s['stage']:<10} {s['wall_s'] * 1000:9.1f} ms wall {s['cpu_s'] * 1000:9.1f} ms cpu  {s['status']}"
+            for s in self.spans
+        )
@@ -1,132 +1,268 @@
 import os
 import sys
-import yaml
-import pandas as pd
+import time
+import argparse
+import importlib
 import logging
-from datetime import date
-from dotenv import load_dotenv
+from datetime import date, timedelta
 
-# Import modules
-from market_calendar import MarketCalendar
-from data_provider import DataProvider
-from strategy_gem import GemStrategy
-from reporter import Reporter
-from email_resend import EmailSender
+# Only stdlib-backed modules are imported eagerly. pandas, yfinance, resend and
+# dotenv are loaded by the stages that need them (see lazy_import), so runs that
+# have nothing to do exit before paying for those imports.
+from history_store import HistoryStore
+from instrumentation import RunTracer
 
-# Setup Logging
 LOG_DIR = "app/logs"
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
-    
-logging.basicConfig(
-    filename=os.path.join(LOG_DIR, "app.log"),
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-logging.getLogger().addHandler(console_handler)
+REPORTS_DIR = "app/reports"
+
 logger = logging.getLogger(__name__)
 
+# Seconds spent importing each lazily loaded module (see --import-times)
+IMPORT_TIMES = {}
+
+def lazy_import(module_name: str):
+    """
+    Imports a module on first use and records how long the import took.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    IMPORT_TIMES[module_name] = time.perf_counter() - start
+    return module
+
+def print_import_times():
+    total = sum(IMPORT_TIMES.values())
+    print(f"Import times (total {total * 1000:.1f} ms):")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {name:<20} {seconds * 1000:8.1f} ms")
+
+def setup_logging():
+    # Setup Logging
+    if not os.path.exists(LOG_DIR):
+        os.makedirs(LOG_DIR)
+
+    logging.basicConfig(
+        filename=os.path.join(LOG_DIR, "app.log"),
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    logging.getLogger().addHandler(console_handler)
+
 def load_config(path="app/config/config.yaml"):
+    yaml = lazy_import("yaml")
     with open(path, "r") as f:
-        return yaml.safe_load(f)
+        config = yaml.safe_load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Config {path} is empty or not a mapping.")
+    return config
 
-def append_history(decision, date_point, filename="decisions.csv"):
-    file_exists = os.path.isfile(filename)
-    
-    # Flatten dict for csv
-    record = {
-        "date": date_point.date(),
-        "selected_asset": decision['selected_asset_key'],
-        "ticker": decision['selected_ticker'],
-        "mode": decision['mode'],
-        "momentum_us": decision['momentum']['US'],
-        "momentum_exus": decision['momentum']['EXUS'],
-        "momentum_cash": decision['momentum']['CASH_PROXY'],
-        "timestamp": pd.Timestamp.now()
-    }
-    
-    df = pd.DataFrame([record])
-    
-    if not file_exists:
-        df.to_csv(filename, index=False)
-    else:
-        df.to_csv(filename, mode='a', header=False, index=False)
+def open_history(config) -> HistoryStore:
+    history_config = config.get('history', {})
+    return HistoryStore(
+        db_path=history_config.get('db_path', 'app/data/history.sqlite'),
+        csv_path=history_config.get('csv_path', 'app/decisions.csv')
+    )
+
+def get_target_month(today: date) -> str:
+    """
+    Returns the month (YYYY-MM) the run reports on: the previous calendar month.
+    """
+    return (today.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+
+def is_run_day(today: date) -> bool:
+    """
+    Scheduled runs happen on the first Monday of the month (PRD).
+    """
+    return today.weekday() == 0 and today.day <= 7
+
+def check_work_needed(config, today: date, scheduled: bool, reports_dir: str = REPORTS_DIR) -> bool:
+    """
+    Cheap checks done before any heavy import: is this a run day and is the
+    target month still missing its report or history row.
+    """
+    if scheduled and not is_run_day(today):
+        print(f"{today} is not the first Monday of the month. Nothing to do.")
+        return False
+
+    month = get_target_month(today)
+    report_exists = os.path.isfile(os.path.join(reports_dir, f"{month}.md"))
+    history_exists = open_history(config).has_month(month)
+
+    if report_exists and history_exists:
+        print(f"Report and history for {month} already exist. Nothing to do (use --force to rerun).")
+        return False
+    return True
+
+def append_history(decision, date_point, store: HistoryStore):
+    """
+    Upserts the decision for date_point (re-runs of the same month replace the row).
+    """
+    store.upsert(HistoryStore.record_from_decision(decision, date_point))
+
+def publish_decision(config, prices_df, monthly_prices, analysis_date, point_dates, tracer: RunTracer,
+                     reports_dir: str = REPORTS_DIR, log: logging.Logger = logger):
+    """
+    Stages 4-8 of a run on already fetched prices: data quality, strategy, report, email and history.
+
+    Args:
+        prices_df: Daily closes for config['tickers'] (columns: ticker keys).
+        monthly_prices: As-of price points at point_dates.
+        reports_dir: Where the Markdown report is written.
+
+    Returns:
+        The decision dict.
+
+    Raises:
+        ValueError: The data-quality check failed; nothing is sent or stored.
+    """
+    # 4. Data quality: fail fast before a decision is computed from bad prices
+    with tracer.span("validate") as span:
+        validation_config = config.get('validation', {})
+        DataQualityValidator = lazy_import("data_quality").DataQualityValidator
+        validator = DataQualityValidator.from_config(validation_config)
+        quality = validator.validate(prices_df, analysis_date, point_dates, expected_columns=list(config['tickers']))
+        span.update({"errors": quality.count("error"), "warnings": quality.count("warning")})
+    if quality.issues:
+        log.warning(f"Data quality issues:\n{quality.describe('info')}")
+    if quality.should_fail(validation_config.get('fail_on', 'error')):
+        raise ValueError(f"Data quality check failed, no decision sent:\n{quality.describe()}")
+
+    # 5. Strategy
+    with tracer.span("strategy") as span:
+        GemStrategy = lazy_import("strategy_gem").GemStrategy
+        strat = GemStrategy(config)
+        decision = strat.calculate_decision_from_history(monthly_prices)
+        span["selected"] = decision['selected_asset_key']
+    log.info(f"Decision Calculated: {decision['selected_asset_key']} ({decision['mode']})")
+
+    # 6. Reporting
+    with tracer.span("report"):
+        Reporter = lazy_import("reporter").Reporter
+        reporter = Reporter(output_dir=reports_dir)
+        report_content = reporter.generate_report_content(decision, analysis_date, config['tickers'], quality)
+        report_path = reporter.save_report(report_content, analysis_date.strftime('%Y-%m'))
+    log.info(f"Report saved to {report_path}")
+
+    # 7. Email
+    with tracer.span("email"):
+        subject = f"{config['email']['subject_prefix']} - {analysis_date.strftime('%Y-%m')} ({decision['mode']})"
+        EmailSender = lazy_import("email_resend").EmailSender
+        email_sender = EmailSender(config)
+        email_sender.send_email(subject, report_content)
+
+    # 8. History
+    with tracer.span("history"):
+        append_history(decision, analysis_date, open_history(config))
+    log.info("History updated.")
+    return decision
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="GEM ETF Decision App")
+    parser.add_argument("--force", action="store_true", help="Run even if this month's report and history exist.")
+    parser.add_argument("--scheduled", action="store_true", help="Only run on the first Monday of the month.")
+    parser.add_argument("--import-times", action="store_true", help="Print the time spent importing heavy modules.")
+    parser.add_argument("--profile", action="append", default=[], metavar="STAGE",
+                        help="Run a stage (config, dates, data, validate, strategy, report, email, history or 'all') under cProfile.")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    try:
+        run(args)
+    finally:
+        if args.import_times:
+            print_import_times()
+
+def run(args):
+    try:
+        config = load_config()
+    except Exception as e:
+        # Logging is normally set up only once there is work to do; a broken
+        # config must still end up in app.log
+        setup_logging()
+        logger.error(f"Could not load configuration: {e}", exc_info=True)
+        sys.exit(1)
+    today = date.today()
+
+    if not args.force and not check_work_needed(config, today, args.scheduled):
+        return
+
+    setup_logging()
     logger.info("Starting GEM ETF Decision App")
-    load_dotenv() # Load .env if present
+    lazy_import("dotenv").load_dotenv() # Load .env if present
+
+    # Spans are written next to app.log, one JSON line per stage
+    tracer = RunTracer(path=os.path.join(LOG_DIR, "spans.jsonl"), profile_stages=args.profile,
+                       profile_dir=os.path.join(LOG_DIR, "profiles"))
     
     try:
         # 1. Configuration
-        config = load_config()
-        
-        # Override email config with environment variables if present (Security best practice)
-        if os.getenv("EMAIL_FROM"):
-            config['email']['from'] = os.getenv("EMAIL_FROM")
-        if os.getenv("EMAIL_TO"):
-            config['email']['to'] = os.getenv("EMAIL_TO")
+        with tracer.span("config"):
+            # Override email config with environment variables if present (Security best practice)
+            if os.getenv("EMAIL_FROM"):
+                config['email']['from'] = os.getenv("EMAIL_FROM")
+            if os.getenv("EMAIL_TO"):
+                config['email']['to'] = os.getenv("EMAIL_TO")
             
         logger.info("Configuration loaded.")
         
         # 2. Determine Dates
-        today = date.today()
-        # Ensure we are looking at the end of the previous month
-        analysis_date = MarketCalendar.get_last_trading_session_last_month(today)
-        logger.info(f"Analysis Date (End of Last Month): {analysis_date.date()}")
-        
-        likback_months = config['strategy']['lookback_months']
-        # We need data from 12 months prior to analysis_date
-        # To be safe with fetch, we go back a bit further
-        comparison_date_approx = MarketCalendar.get_lookback_date(analysis_date, likback_months)
-        fetch_start_date = comparison_date_approx - pd.DateOffset(months=1) # Buffer
+        with tracer.span("dates") as span:
+            pd = lazy_import("pandas")
+            MarketCalendar = lazy_import("market_calendar").MarketCalendar
+            # Ensure we are looking at the end of the previous month
+            analysis_date = MarketCalendar.get_last_trading_session_last_month(today)
+            logger.info(f"Analysis Date (End of Last Month): {analysis_date.date()}")
+            
+            # Longest momentum horizon (strategy.horizons or lookback_months)
+            BlendedMomentum = lazy_import("momentum_engine").BlendedMomentum
+            likback_months = BlendedMomentum.from_config(config['strategy']).max_months
+            # We need data from 12 months prior to analysis_date
+            # To be safe with fetch, we go back a bit further
+            comparison_date_approx = MarketCalendar.get_lookback_date(analysis_date, likback_months)
+            fetch_start_date = comparison_date_approx - pd.DateOffset(months=1) # Buffer
+            span["analysis_date"] = analysis_date.date()
         
         logger.info(f"Fetching data from approx {fetch_start_date.date()} to {analysis_date.date()}")
         
         # 3. Data Provider
-        dp = DataProvider()
-        prices_df = dp.get_closes(config['tickers'], fetch_start_date, analysis_date)
-        
-        # Extract specific price points
-        current_prices = dp.get_price_at_date(prices_df, analysis_date)
-        
-        # Get price exactly lookback_months ago (or closest previous trading day)
-        # We look for the price at (analysis_date - 12 months)
-        # Re-calculate exact target date for strategy
-        target_prev_date = analysis_date - pd.DateOffset(months=likback_months)
-        
-        # We need to find the closes valid trading day on or before target_prev_date
-        prev_prices = dp.get_price_at_date(prices_df, target_prev_date)
+        with tracer.span("data") as span:
+            # Prices are served from the local store, only missing ranges hit Yahoo
+            DataProvider = lazy_import("data_provider").DataProvider
+            dp = DataProvider.from_config(config)
+            try:
+                # Missing tickers are reported by the data-quality stage below
+                prices_df = dp.get_closes(config['tickers'], fetch_start_date, analysis_date, allow_partial=True)
+            finally:
+                span.update(dp.stats)
+            
+            # Extract specific price points
+            current_prices = dp.get_price_at_date(prices_df, analysis_date)
+            
+            # One price point per month back to the longest horizon: the month-end sessions
+            # the backtest compares (batched as-of lookup); every momentum window is a
+            # difference between two of these rows
+            point_dates = list(MarketCalendar.month_end_points(analysis_date, likback_months))
+            monthly_prices = dp.get_prices_at_dates(prices_df, point_dates)
+
+            # Price at the start of the longest lookback window
+            prev_prices = monthly_prices.iloc[0]
         
         logger.info(f"Price Current ({current_prices.name.date() if hasattr(current_prices.name, 'date') else current_prices.name}):\n{current_prices.to_dict()}")
         logger.info(f"Price Previous ({prev_prices.name.date() if hasattr(prev_prices.name, 'date') else prev_prices.name}):\n{prev_prices.to_dict()}")
         
-        # 4. Strategy
-        strat = GemStrategy(config)
-        decision = strat.calculate_decision(current_prices, prev_prices)
-        logger.info(f"Decision Calculated: {decision['selected_asset_key']} ({decision['mode']})")
-        
-        # 5. Reporting
-        reporter = Reporter()
-        report_content = reporter.generate_report_content(decision, analysis_date, config['tickers'])
-        report_path = reporter.save_report(report_content, analysis_date.strftime('%Y-%m'))
-        logger.info(f"Report saved to {report_path}")
-        
-        # 6. Email
-        subject = f"{config['email']['subject_prefix']} - {analysis_date.strftime('%Y-%m')} ({decision['mode']})"
-        email_sender = EmailSender(config)
-        email_sender.send_email(subject, report_content)
-        
-        # 7. History
-        append_history(decision, analysis_date, filename="app/decisions.csv")
-        logger.info("History updated.")
+        publish_decision(config, prices_df, monthly_prices, analysis_date, point_dates, tracer)
         
         logger.info("Execution completed successfully.")
         
     except Exception as e:
         logger.error(f"An error occurred: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        logger.info(f"Stage timings (run {tracer.run_id}):\n{tracer.summary()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,189 @@
+import hashlib
+import html
+import re
+from collections import OrderedDict
+from typing import List
+
+# Styled fragments, built once at import
+H1_STYLE = 'color: #0366d6; font-size: 24px; border-bottom: 1px solid #eaecef; padding-bottom: 0.3em;'
+H2_STYLE = 'font-size: 20px; border-bottom: 1px solid #eaecef; padding-bottom: 0.3em; margin-top: 24px;'
+HR_HTML = '<hr style="border: 0; border-top: 2px solid #eaecef; margin: 20px 0;">'
+SPACER_HTML = '<div style="height: 10px;"></div>'
+LIST_ITEM_TEMPLATE = '<div style="margin-left: {indent}px; margin-bottom: 5px;">• {text}</div>'
+TABLE_OPEN = '<table style="width: 100%; border-collapse: collapse; margin-top: 15px; margin-bottom: 15px; font-size: 14px;">'
+TH_TEMPLATE = '<th style="border: 1px solid #dfe2e5; padding: 6px 13px; background-color: #f6f8fa; font-weight: bold; text-align: left;">{}</th>'
+TD_TEMPLATE = '<td style="border: 1px solid #dfe2e5; padding: 6px 13px;">{}</td>'
+
+KEYWORD_HTML = {
+    "RISK-ON": "<span style='color: green; font-weight: bold;'>RISK-ON</span>",
+    "RISK-OFF": "<span style='color: red; font-weight: bold;'>RISK-OFF</span>",
+    "BUY": "<span style='color: green; font-weight: bold;'>BUY</span>",
+    "HOLD/SELL": "<span style='color: #d73a49; font-weight: bold;'>HOLD/SELL</span>",
+    "SELL": "<span style='color: red; font-weight: bold;'>SELL</span>",
+}
+
+# Longest keywords first, so HOLD/SELL is one token and never matched again as SELL
+KEYWORD_PATTERN = re.compile("|".join(re.escape(k) for k in sorted(KEYWORD_HTML, key=len, reverse=True)))
+# Bold spans and keywords in one alternation, so each line is scanned once
+INLINE_PATTERN = re.compile(r'\*\*(.+?)\*\*|' + KEYWORD_PATTERN.pattern)
+HEADING_PATTERN = re.compile(r'^(#{1,2}) (.+)$')
+LIST_PATTERN = re.compile(r'^(\s*)-\s+(.+)$')
+
+PAGE_TEMPLATE = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+                body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; color: #24292e; }
+                .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                .card { background: #ffffff; border-radius: 6px; border: 1px solid #e1e4e8; padding: 32px; }
+                .footer { font-size: 12px; color: #586069; text-align: center; margin-top: 24px; }
+            </style>
+        </head>
+        <body style="background-color: #f6f8fa;">
+            <div class="container">
+                <div class="card">
+                    %BODY%
+                </div>
+                <div class="footer">
+                    Automated email from GEM ETF Decision App
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+def _keyword_html(match: re.Match) -> str:
+    return KEYWORD_HTML[match.group(0)]
+
+def content_hash(content: str) -> str:
+    """
+    SHA-256 of the Markdown source; equal hashes render to identical HTML.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+class MarkdownRenderer:
+    """
+    Renders the report Markdown subset into the styled HTML email.
+
+    Handles what reporter.py emits: '#'/'##' headings, **bold**, '---' rules,
+    '- ' list items (indented items are nested one level), pipe tables and the
+    signal keywords (RISK-ON, RISK-OFF, BUY, SELL, HOLD/SELL). The document is
+    processed in a single pass over its lines with patterns compiled at import;
+    inline markup is tokenized once per line, so keyword highlights never nest.
+    Text is HTML-escaped before markup is applied.
+
+    Rendered pages are cached by content hash (LRU, cache_size entries), so
+    re-sending or backfilling the same report renders it once.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def render_html(self, content: str) -> str:
+        """
+        Full HTML page for content, served from the cache when possible.
+        """
+        key = content_hash(content)
+        page = self._cache.get(key)
+        if page is not None:
+            self._cache.move_to_end(key)
+            return page
+
+        page = self.render(content)
+        self._cache[key] = page
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return page
+
+    def render(self, content: str) -> str:
+        """
+        Renders content without the cache.
+        """
+        return PAGE_TEMPLATE.replace("%BODY%", self.render_body(content))
+
+    def render_body(self, content: str) -> str:
+        out: List[str] = []
+        in_table = False
+        after_rule = False
+
+        for line in content.split('\n'):
+            stripped = line.strip()
+
+            if stripped.startswith('|'):
+                if '---' in stripped:  # separator row
+                    continue
+                # Inline markup never produces '|', so the row is marked up once and then split
+                cells = [c.strip() for c in self._inline(stripped.strip('|')).split('|')]
+                if not in_table:
+                    in_table = True
+                    out.append(TABLE_OPEN)
+                    out.append('<thead><tr>')
+                    out.extend([TH_TEMPLATE.format(c) for c in cells])
+                    out.append('</tr></thead><tbody>')
+                else:
+                    out.append('<tr>')
+                    out.extend([TD_TEMPLATE.format(c) for c in cells])
+                    out.append('</tr>')
+                continue
+
+            if in_table:
+                in_table = False
+                out.append('</tbody></table>')
+
+            # A rule absorbs the blank line on either side of it
+            if not stripped:
+                if not after_rule:
+                    out.append(SPACER_HTML)
+                after_rule = False
+                continue
+            after_rule = False
+            # Dispatch on the first character; regexes only run on candidate lines
+            first = stripped[0]
+            if stripped == '---':
+                if out and out[-1] == SPACER_HTML:
+                    out.pop()
+                out.append(HR_HTML)
+                after_rule = True
+            elif first == '#' and (match := HEADING_PATTERN.match(line)):
+                level = len(match.group(1))
+                style = H1_STYLE if level == 1 else H2_STYLE
+                out.append(f'<h{level} style="{style}">{self._inline(match.group(2))}</h{level}>')
+            elif first == '-' and (match := LIST_PATTERN.match(line)):
+                indent = 40 if match.group(1) else 20
+                out.append(LIST_ITEM_TEMPLATE.format(indent=indent, text=self._inline(match.group(2))))
+            else:
+                out.append(f'<div>{self._inline(line)}</div>')
+
+        if in_table:
+            out.append('</tbody></table>')
+        return "\n".join(out)
+
+    @staticmethod
+    def _keywords(text: str) -> str:
+        return KEYWORD_PATTERN.sub(_keyword_html, text)
+
+    def _inline(self, text: str) -> str:
+        """
+        Escapes text, then applies bold and keyword markup in one scan.
+        """
+        if '&' in text or '<' in text or '>' in text:
+            text = html.escape(text, quote=False)
+        return INLINE_PATTERN.sub(self._inline_token, text)
+
+    def _inline_token(self, match: re.Match) -> str:
+        bold = match.group(1)
+        if bold is None:
+            return KEYWORD_HTML[match.group(0)]
+        return f'<b>{self._keywords(bold)}</b>'
+
+# Shared instance used by EmailSender
+_default_renderer = MarkdownRenderer()
+
+def render_html(content: str) -> str:
+    """
+    Renders report Markdown to the HTML email page (cached by content hash).
+    """
+    return _default_renderer.render_html(content)
@@ -1,36 +1,199 @@
+import os
+import numpy as np
 import pandas as pd
 from datetime import date, timedelta
+from typing import Iterable, Optional
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, USPresidentsDay, USMemorialDay,
+    USLaborDay, USThanksgivingDay, nearest_workday, sunday_to_monday
+)
+from pandas.tseries.offsets import DateOffset
+from dateutil.relativedelta import MO
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Full-day NYSE holidays (regular rules plus one-off closures).
+    """
+    rules = [
+        # New Year's Day on a Saturday is not observed on the Friday before
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        Holiday('Martin Luther King Jr. Day', month=1, day=1, offset=DateOffset(weekday=MO(3)), start_date='1998-01-01'),
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, observance=nearest_workday, start_date='2022-01-01'),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+    # Unscheduled closures (national days of mourning, 9/11, Hurricane Sandy)
+    special_closures = pd.DatetimeIndex([
+        '1994-04-27', '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',
+        '2004-06-11', '2007-01-02', '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09',
+    ])
 
 class MarketCalendar:
+    # Range of the precomputed session table
+    TABLE_START = date(1990, 1, 1)
+    TABLE_END = date(2050, 12, 31)
+    # Bump when holiday rules change so stale disk caches are rebuilt
+    TABLE_VERSION = 1
+    CACHE_DIR = "app/data"
+
+    _session_days: Optional[np.ndarray] = None
+
+    @classmethod
+    def _cache_path(cls) -> str:
+        return os.path.join(cls.CACHE_DIR, f"nyse_sessions_v{cls.TABLE_VERSION}_{cls.TABLE_START.year}_{cls.TABLE_END.year}.npy")
+
+    @classmethod
+    def _build_session_days(cls) -> np.ndarray:
+        calendar = NYSEHolidayCalendar()
+        holidays = calendar.holidays(cls.TABLE_START, cls.TABLE_END).union(NYSEHolidayCalendar.special_closures)
+        sessions = pd.bdate_range(cls.TABLE_START, cls.TABLE_END).difference(holidays)
+        return sessions.to_numpy().astype('datetime64[D]').astype(np.int32)
+
+    @classmethod
+    def get_session_days(cls) -> np.ndarray:
+        """
+        Returns all NYSE sessions in the table as sorted int32 day numbers (days since 1970-01-01).
+
+        The holiday rules are evaluated once and the table is cached on disk and in memory.
+        """
+        if cls._session_days is None:
+            path = cls._cache_path()
+            if os.path.exists(path):
+                cls._session_days = np.load(path)
+            else:
+                cls._session_days = cls._build_session_days()
+                try:
+                    os.makedirs(cls.CACHE_DIR, exist_ok=True)
+                    np.save(path, cls._session_days)
+                except OSError as e:
+                    print(f"Warning: could not cache trading calendar to {path}: {e}")
+        return cls._session_days
+
+    @classmethod
+    def _to_days(cls, dates) -> np.ndarray:
+        days = np.atleast_1d(pd.to_datetime(dates)).astype('datetime64[D]').astype(np.int64)
+        lo = np.datetime64(cls.TABLE_START, 'D').astype(np.int64)
+        hi = np.datetime64(cls.TABLE_END, 'D').astype(np.int64)
+        if days.size and (days.min() < lo or days.max() > hi):
+            raise ValueError(f"Dates outside the trading calendar range {cls.TABLE_START} - {cls.TABLE_END}")
+        return days
+
+    @staticmethod
+    def _to_index(days: np.ndarray) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(days.astype('datetime64[D]').astype('datetime64[ns]'))
+
+    @classmethod
+    def sessions(cls, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+        """
+        Returns all trading sessions between start and end (inclusive).
+        """
+        days = cls.get_session_days()
+        lo, hi = cls._to_days([start, end])
+        return cls._to_index(days[np.searchsorted(days, lo, side='left'):np.searchsorted(days, hi, side='right')])
+
+    @classmethod
+    def is_session(cls, dates: Iterable[pd.Timestamp]) -> np.ndarray:
+        days = cls.get_session_days()
+        query = cls._to_days(dates)
+        positions = np.clip(np.searchsorted(days, query), 0, len(days) - 1)
+        return days[positions] == query
+
+    @classmethod
+    def previous_session(cls, dates: Iterable[pd.Timestamp]) -> pd.DatetimeIndex:
+        """
+        Returns the last session on or before each date.
+        """
+        days = cls.get_session_days()
+        positions = np.searchsorted(days, cls._to_days(dates), side='right') - 1
+        if (positions < 0).any():
+            raise ValueError("Date before the first session of the trading calendar.")
+        return cls._to_index(days[positions])
+
+    @classmethod
+    def next_session(cls, dates: Iterable[pd.Timestamp]) -> pd.DatetimeIndex:
+        """
+        Returns the first session strictly after each date.
+        """
+        days = cls.get_session_days()
+        positions = np.searchsorted(days, cls._to_days(dates), side='right')
+        if (positions >= len(days)).any():
+            raise ValueError("Date after the last session of the trading calendar.")
+        return cls._to_index(days[positions])
+
+    @classmethod
+    def month_end_sessions(cls, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+        """
+        Returns the last session of every month between start and end (inclusive).
+        Only months whose last session falls inside the range are returned.
+        """
+        days = cls.get_session_days()
+        months = days.astype('datetime64[D]').astype('datetime64[M]')
+        is_month_end = np.ones(len(days), dtype=bool)
+        is_month_end[:-1] = months[1:] != months[:-1]
+
+        lo, hi = cls._to_days([start, end])
+        month_ends = days[is_month_end]
+        return cls._to_index(month_ends[(month_ends >= lo) & (month_ends <= hi)])
+
+    @classmethod
+    def month_end_points(cls, analysis_date: pd.Timestamp, months: int) -> pd.DatetimeIndex:
+        """
+        Returns the momentum price points for a decision at analysis_date: the last
+        session of each of the 'months' previous months, then analysis_date itself.
+
+        These are the rows a month-end close history (backtest, robustness) compares,
+        so a single decision sees the same windows as the vectorized ones.
+
+        Raises:
+            ValueError: The lookback reaches outside the trading calendar.
+        """
+        analysis_date = pd.Timestamp(analysis_date)
+        month_start = analysis_date.replace(day=1)
+        previous = cls.month_end_sessions(month_start - pd.DateOffset(months=months), month_start - pd.Timedelta(days=1))
+        return previous.append(pd.DatetimeIndex([analysis_date]))
+
+    @classmethod
+    def sessions_months_before(cls, dates: Iterable[pd.Timestamp], months: int) -> pd.DatetimeIndex:
+        """
+        Returns, for each date, the last session on or before the same day 'months' earlier.
+        """
+        shifted = pd.DatetimeIndex(pd.to_datetime(list(np.atleast_1d(dates)))) - pd.DateOffset(months=months)
+        return cls.previous_session(shifted)
+
     @staticmethod
     def get_last_trading_session_last_month(current_date: date) -> pd.Timestamp:
         """
-        Calculates the last business day of the previous calendar month.
-        
+        Calculates the last NYSE trading session of the previous calendar month.
+
         Args:
             current_date (date): The current date (usually the execution date).
-            
+
         Returns:
-            pd.Timestamp: The timestamp of the last business day of the previous month.
+            pd.Timestamp: The timestamp of the last trading session of the previous month.
         """
         # First day of current month
         first_of_current = current_date.replace(day=1)
         # Last day of previous month
         last_of_prev = first_of_current - timedelta(days=1)
-        
-        # Use pandas BMonthEnd to find the nearest previous business day end of month
-        # rollback will move to the month end on or before the date
-        return pd.tseries.offsets.BMonthEnd().rollback(last_of_prev)
+
+        # Roll back to the last session on or before month end (skips weekends and exchange holidays)
+        return MarketCalendar.previous_session([last_of_prev])[0]
 
     @staticmethod
     def get_lookback_date(reference_date: pd.Timestamp, months: int) -> pd.Timestamp:
         """
         Calculates the date 'months' ago.
-        
+
         Args:
             reference_date (pd.Timestamp): The end date.
             months (int): Number of months to look back.
-            
+
         Returns:
             pd.Timestamp: The date months ago.
         """
@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+class MomentumEngine:
+    """
+    Dual-momentum rotation over arbitrary asset groups.
+
+    - Absolute momentum: the market is RISK-ON when the risk signal asset
+      (e.g. US) beats the benchmark (e.g. CASH_PROXY), otherwise RISK-OFF.
+    - Relative momentum: in RISK-ON the top_k assets of the equity group are
+      selected, in RISK-OFF the top defensive_top_k of the defensive group.
+
+    Momentum for all assets is computed in one array operation and the top-k
+    selection uses a partial sort (argpartition). Ties are broken by the order
+    of the assets in the group config (earlier wins), so results are
+    deterministic. Every method works on a single date (1-D arrays) and on a
+    whole matrix of dates (2-D arrays, dates x assets).
+    """
+
+    def __init__(self, equity: List[str], defensive: List[str], benchmark: str,
+                 risk_signal: Optional[str] = None, top_k: int = 1, defensive_top_k: int = 1):
+        if not equity or not defensive:
+            raise ValueError("Momentum engine needs at least one equity and one defensive asset.")
+
+        self.equity = list(equity)
+        self.defensive = list(defensive)
+        self.benchmark = benchmark
+        self.risk_signal = risk_signal or self.equity[0]
+        self.top_k = min(top_k, len(self.equity))
+        self.defensive_top_k = min(defensive_top_k, len(self.defensive))
+
+        # Column order of every momentum array
+        self.assets = list(dict.fromkeys(self.equity + self.defensive + [self.benchmark, self.risk_signal]))
+        position = {key: i for i, key in enumerate(self.assets)}
+        self._equity_idx = np.array([position[k] for k in self.equity])
+        self._defensive_idx = np.array([position[k] for k in self.defensive])
+        self._benchmark_idx = position[self.benchmark]
+        self._signal_idx = position[self.risk_signal]
+
+    @classmethod
+    def from_config(cls, engine_config: Dict) -> "MomentumEngine":
+        return cls(
+            equity=engine_config['equity'],
+            defensive=engine_config['defensive'],
+            benchmark=engine_config['benchmark'],
+            risk_signal=engine_config.get('risk_signal'),
+            top_k=engine_config.get('top_k', 1),
+            defensive_top_k=engine_config.get('defensive_top_k', 1),
+        )
+
+    def momentum(self, prices_t: np.ndarray, prices_prev: np.ndarray) -> np.ndarray:
+        """
+        Returns (prices_t / prices_prev) - 1 for all assets (columns in self.assets order).
+        """
+        return np.asarray(prices_t, dtype=np.float64) / np.asarray(prices_prev, dtype=np.float64) - 1
+
+    @staticmethod
+    def rank_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Column indices of the k highest scores per row, best first.
+
+        argpartition finds the k-th best value in O(n); ties on that value are
+        filled in column order, and only the k winners are fully sorted.
+        """
+        scores = np.atleast_2d(np.where(np.isnan(scores), -np.inf, scores))
+        n_rows = scores.shape[0]
+
+        kth = np.take_along_axis(scores, np.argpartition(-scores, k - 1, axis=1)[:, k - 1:k], axis=1)
+        greater = scores > kth
+        equal = scores == kth
+        # Fill the remaining slots with the earliest columns equal to the k-th value
+        slots_left = k - greater.sum(axis=1, keepdims=True)
+        chosen = greater | (equal & (np.cumsum(equal, axis=1) <= slots_left))
+
+        winners = np.nonzero(chosen)[1].reshape(n_rows, k)
+        # Stable sort keeps column order for equal scores
+        order = np.argsort(-np.take_along_axis(scores, winners, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(winners, order, axis=1)
+
+    def select(self, momentum: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Applies the dual-momentum rules.
+
+        Args:
+            momentum: (n_assets,) or (n_dates, n_assets) array in self.assets order.
+
+        Returns:
+            Dict with 'risk_on' (n_dates,) bool and 'selected' (n_dates, k) indices into
+            self.assets (k = top_k, padded with -1 in RISK-OFF when defensive_top_k is smaller).
+        """
+        momentum = np.atleast_2d(momentum)
+        risk_on = momentum[:, self._signal_idx] > momentum[:, self._benchmark_idx]
+
+        k = max(self.top_k, self.defensive_top_k)
+        selected = np.full((len(momentum), k), -1, dtype=np.int64)
+
+        equity_pick = self._equity_idx[self.rank_top_k(momentum[:, self._equity_idx], self.top_k)]
+        defensive_pick = self._defensive_idx[self.rank_top_k(momentum[:, self._defensive_idx], self.defensive_top_k)]
+
+        selected[risk_on, :self.top_k] = equity_pick[risk_on]
+        selected[~risk_on, :self.defensive_top_k] = defensive_pick[~risk_on]
+        return {"risk_on": risk_on, "selected": selected}
+
+    def decide(self, prices_t: pd.Series, prices_prev: pd.Series) -> Dict[str, Any]:
+        """
+        Single-date decision from two price points (Series indexed by asset key).
+        """
+        momentum = self.momentum(prices_t.reindex(self.assets).to_numpy(), prices_prev.reindex(self.assets).to_numpy())
+        result = self.select(momentum)
+        selected = [self.assets[i] for i in result['selected'][0] if i >= 0]
+        return {
+            "risk_on": bool(result['risk_on'][0]),
+            "selected": selected,
+            "momentum": dict(zip(self.assets, momentum)),
+        }
+
+    def decide_matrix(self, closes: pd.DataFrame, lookback_rows: int) -> pd.DataFrame:
+        """
+        Decisions for every row of a close matrix, comparing each row with the row lookback_rows earlier.
+
+        Returns:
+            pd.DataFrame indexed like closes with columns risk_on, selected_1..k and
+            momentum_<KEY>. Rows without a full lookback window are dropped.
+        """
+        values = closes.reindex(columns=self.assets).to_numpy(dtype=np.float64)
+        momentum = np.full_like(values, np.nan)
+        momentum[lookback_rows:] = self.momentum(values[lookback_rows:], values[:-lookback_rows])
+
+        result = self.select(momentum)
+        assets = np.array(self.assets + [None], dtype=object)  # -1 maps to None
+
+        decisions = pd.DataFrame({"risk_on": result['risk_on']}, index=closes.index)
+        for rank in range(result['selected'].shape[1]):
+            decisions[f"selected_{rank + 1}"] = assets[result['selected'][:, rank]]
+        for i, key in enumerate(self.assets):
+            decisions[f"momentum_{key}"] = momentum[:, i]
+
+        needed = [self._signal_idx, self._benchmark_idx]
+        valid = ~np.isnan(momentum[:, needed]).any(axis=1)
+        return decisions[valid]
+
+class BlendedMomentum:
+    """
+    Weighted blend of returns over several horizons (e.g. 1/3/6/12 months or 12-1).
+
+    Works on month-anchored log prices: row t is the close at the measurement
+    point, row t-k the close k months earlier. Log prices are the cumulative sum
+    of monthly log returns, so every window is a single difference
+    L[t - skip] - L[t - months], and extra horizons cost one array subtraction each.
+    """
+
+    def __init__(self, horizons: List[Dict]):
+        if not horizons:
+            raise ValueError("At least one momentum horizon is required.")
+        self.horizons = []
+        for horizon in horizons:
+            if not isinstance(horizon, dict) or 'months' not in horizon:
+                raise ValueError(f"Invalid momentum horizon {horizon}: expected a mapping with 'months'.")
+            months = int(horizon['months'])
+            skip = int(horizon.get('skip', 0))
+            if months <= skip or skip < 0:
+                raise ValueError(f"Invalid momentum horizon {horizon}: months must be greater than skip.")
+            weight = float(horizon.get('weight', 1.0))
+            # Weights are normalized by their sum, so each one must be a positive number
+            if not np.isfinite(weight) or weight <= 0:
+                raise ValueError(f"Invalid momentum horizon {horizon}: weight must be positive.")
+            self.horizons.append({"months": months, "skip": skip, "weight": weight})
+
+        total = sum(h['weight'] for h in self.horizons)
+        self.weights = np.array([h['weight'] / total for h in self.horizons])
+        self.max_months = max(h['months'] for h in self.horizons)
+
+    @classmethod
+    def from_config(cls, strategy_config: Dict) -> "BlendedMomentum":
+        """
+        Uses strategy.horizons if present, otherwise the single lookback_months return.
+
+        Raises:
+            ValueError: horizons is set but empty, or a horizon is invalid.
+        """
+        horizons = strategy_config.get('horizons')
+        if horizons is None:
+            horizons = [{"months": strategy_config['lookback_months']}]
+        return cls(horizons)
+
+    @property
+    def labels(self) -> List[str]:
+        return [f"{h['months']}-{h['skip']}M" if h['skip'] else f"{h['months']}M" for h in self.horizons]
+
+    @property
+    def is_blended(self) -> bool:
+        return len(self.horizons) > 1 or self.horizons[0]['skip'] > 0
+
+    def components(self, monthly_prices: np.ndarray) -> np.ndarray:
+        """
+        Returns of every horizon for every row.
+
+        Args:
+            monthly_prices: (n_months, n_assets) closes, one row per month, oldest first.
+
+        Returns:
+            (n_horizons, n_months, n_assets) simple returns; NaN where the window is incomplete.
+        """
+        log_prices = np.log(np.asarray(monthly_prices, dtype=np.float64))
+        n_months = log_prices.shape[0]
+
+        result = np.full((len(self.horizons),) + log_prices.shape, np.nan)
+        for i, h in enumerate(self.horizons):
+            if n_months > h['months']:
+                end = log_prices[h['months'] - h['skip']:n_months - h['skip']]
+                start = log_prices[:n_months - h['months']]
+                result[i, h['months']:] = np.expm1(end - start)
+        return result
+
+    def blend(self, components: np.ndarray) -> np.ndarray:
+        """
+        Weighted average of the horizon returns: (n_months, n_assets).
+        """
+        return np.tensordot(self.weights, components, axes=1)
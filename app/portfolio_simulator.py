@@ -0,0 +1,283 @@
+import argparse
+import math
+import yaml
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+from as_of_index import AsOfIndex
+from backtest import Backtester
+from data_provider import DataProvider
+from strategy_gem import GemStrategy
+
+class PortfolioSimulator:
+    """
+    Net-of-cost portfolio simulation of the monthly GEM decisions.
+
+    Every decision (GemStrategy.calculate_decisions, month-end t) is executed
+    at the close of that session, as in Backtester. On each rebalance date the
+    monthly contribution is added to cash, positions outside the selected
+    asset are sold (at most max_switch_fraction of the portfolio value per
+    month) and the cash is invested in the selected asset. Each trade pays:
+      - half of the bid-ask spread (spread_bps) on the execution price
+      - commission: max(commission_min, commission_fixed + commission_rate * value)
+      - on sales, tax_rate on the realized gain over the average cost basis
+        (commissions and spreads included), after offsetting realized losses
+        carried forward from earlier sales
+    Trades smaller than min_trade_value are skipped; without fractional_shares
+    only whole shares are bought and the remainder stays in cash.
+
+    Only the rebalance events (one per month) are stepped through. Holdings
+    and cash are constant between them, so the daily positions, cash and
+    equity are built with one searchsorted over the session dates and a single
+    product with the forward-filled close matrix.
+    """
+
+    def __init__(self, config: Dict, initial_capital: float = 10000.0, monthly_contribution: float = 0.0,
+                 commission_rate: float = 0.0, commission_fixed: float = 0.0, commission_min: float = 0.0,
+                 spread_bps: float = 0.0, tax_rate: float = 0.0, max_switch_fraction: float = 1.0,
+                 min_trade_value: float = 0.0, fractional_shares: bool = True):
+        if initial_capital <= 0:
+            raise ValueError("initial_capital must be positive.")
+        if not 0 < max_switch_fraction <= 1:
+            raise ValueError("max_switch_fraction must be in (0, 1].")
+        if not 0 <= tax_rate < 1:
+            raise ValueError("tax_rate must be in [0, 1).")
+        self.config = config
+        self.strategy = GemStrategy(config)
+        self.initial_capital = initial_capital
+        self.monthly_contribution = monthly_contribution
+        self.commission_rate = commission_rate
+        self.commission_fixed = commission_fixed
+        self.commission_min = commission_min
+        self.half_spread = spread_bps / 2 / 10000
+        self.tax_rate = tax_rate
+        self.max_switch_fraction = max_switch_fraction
+        self.min_trade_value = min_trade_value
+        self.fractional_shares = fractional_shares
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "PortfolioSimulator":
+        simulation_config = config.get('simulation', {})
+        commission = simulation_config.get('commission', {})
+        return cls(
+            config,
+            initial_capital=simulation_config.get('initial_capital', 10000.0),
+            monthly_contribution=simulation_config.get('monthly_contribution', 0.0),
+            commission_rate=commission.get('rate', 0.0),
+            commission_fixed=commission.get('fixed', 0.0),
+            commission_min=commission.get('min', 0.0),
+            spread_bps=simulation_config.get('spread_bps', 0.0),
+            tax_rate=simulation_config.get('tax_rate', 0.0),
+            max_switch_fraction=simulation_config.get('max_switch_fraction', 1.0),
+            min_trade_value=simulation_config.get('min_trade_value', 0.0),
+            fractional_shares=simulation_config.get('fractional_shares', True),
+        )
+
+    def commission(self, value: float) -> float:
+        return max(self.commission_min, self.commission_fixed + self.commission_rate * value)
+
+    def _buy_value(self, cash: float) -> float:
+        """
+        Largest trade value whose commission still fits into cash.
+        """
+        value = (cash - self.commission_fixed) / (1 + self.commission_rate)
+        if self.commission_fixed + self.commission_rate * value < self.commission_min:
+            value = cash - self.commission_min
+        return max(value, 0.0)
+
+    def run(self, prices: pd.DataFrame, decisions: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Simulates the portfolio from the first decision to the last session in prices.
+
+        Args:
+            prices: Daily closes, columns are the ticker keys (as returned by DataProvider.get_closes).
+            decisions: Month-end decisions (GemStrategy.calculate_decisions); computed from prices if omitted.
+                Only decisions at a month-end session of prices are traded: a decision inside a month,
+                e.g. on the last bar of a month that is not complete yet, is dropped.
+
+        Returns:
+            Dict with 'daily' (cash, holdings, equity, contributions, per-asset shares and value
+            per session), 'trades', 'decisions' and 'stats'.
+        """
+        prices = prices.dropna(how='all').sort_index()
+        if decisions is None:
+            decisions = self.strategy.calculate_decisions(Backtester.get_month_end_closes(prices))
+        # Same month-end rule as the backtest (the last bar counts only when its month is complete)
+        decisions = decisions[pd.DatetimeIndex(decisions.index).isin(AsOfIndex(prices).month_end_sessions)]
+        if decisions.empty:
+            raise ValueError("No decisions to simulate: need at least one month with a full lookback window.")
+
+        assets = list(prices.columns)
+        closes = prices.loc[decisions.index[0]:].ffill()
+        days = closes.index
+        values = closes.to_numpy(dtype=np.float64)
+        rebalance_positions = days.searchsorted(decisions.index)
+        if (rebalance_positions >= len(days)).any() or not days[rebalance_positions].equals(pd.DatetimeIndex(decisions.index)):
+            raise ValueError("Every decision date must be a session in prices.")
+        targets = np.array([assets.index(key) for key in decisions['selected_asset_key']])
+
+        n_events, n_assets = len(decisions), len(assets)
+        shares = np.zeros(n_assets)
+        cost_basis = np.zeros(n_assets)
+        cash = 0.0
+        loss_carryforward = 0.0
+        held = np.zeros((n_events, n_assets))
+        held_cash = np.zeros(n_events)
+        flows = np.zeros(n_events)
+        trades: List[Dict[str, Any]] = []
+
+        for i, (position, target) in enumerate(zip(rebalance_positions, targets)):
+            price = values[position]
+            date = days[position]
+            flows[i] = self.initial_capital if i == 0 else self.monthly_contribution
+            cash += flows[i]
+            portfolio_value = cash + np.nansum(shares * price)
+
+            # Sell what is outside the target, up to the switch budget for this month
+            sell_budget = self.max_switch_fraction * portfolio_value
+            for a in np.flatnonzero(shares > 0):
+                if a == target or sell_budget <= 0 or np.isnan(price[a]):
+                    continue
+                quantity = min(shares[a], sell_budget / price[a])
+                if not self.fractional_shares and quantity < shares[a]:
+                    quantity = math.floor(quantity)
+                gross = quantity * price[a]
+                if quantity <= 0 or gross < self.min_trade_value:
+                    continue
+                execution = price[a] * (1 - self.half_spread)
+                proceeds = quantity * execution
+                commission = self.commission(proceeds)
+                basis = cost_basis[a] * quantity / shares[a]
+                gain = proceeds - commission - basis
+                taxable = gain - loss_carryforward
+                tax = self.tax_rate * taxable if taxable > 0 else 0.0
+                loss_carryforward = max(-taxable, 0.0)
+
+                cash += proceeds - commission - tax
+                shares[a] -= quantity
+                cost_basis[a] -= basis
+                if shares[a] <= 1e-12:
+                    shares[a], cost_basis[a] = 0.0, 0.0
+                sell_budget -= gross
+                trades.append({"date": date, "asset": assets[a], "side": "SELL", "shares": quantity,
+                               "price": execution, "value": proceeds, "commission": commission,
+                               "spread_cost": gross - proceeds, "tax": tax, "realized_gain": gain})
+
+            # Invest the cash (contribution plus proceeds) in the target
+            if not np.isnan(price[target]):
+                execution = price[target] * (1 + self.half_spread)
+                value = self._buy_value(cash)
+                quantity = value / execution
+                if not self.fractional_shares:
+                    quantity = math.floor(quantity)
+                    value = quantity * execution
+                if quantity > 0 and value >= self.min_trade_value:
+                    commission = self.commission(value)
+                    cash -= value + commission
+                    shares[target] += quantity
+                    cost_basis[target] += value + commission
+                    trades.append({"date": date, "asset": assets[target], "side": "BUY", "shares": quantity,
+                                   "price": execution, "value": value, "commission": commission,
+                                   "spread_cost": quantity * price[target] * self.half_spread, "tax": 0.0,
+                                   "realized_gain": 0.0})
+
+            held[i] = shares
+            held_cash[i] = cash
+
+        # Daily valuation: holdings of the last rebalance on or before every session
+        period = np.searchsorted(rebalance_positions, np.arange(len(days)), side='right') - 1
+        daily_shares = held[period]
+        daily_values = daily_shares * np.nan_to_num(values)
+        daily_cash = held_cash[period]
+        equity = daily_values.sum(axis=1) + daily_cash
+        daily_flows = np.zeros(len(days))
+        daily_flows[rebalance_positions] = flows
+
+        daily = pd.DataFrame({
+            "cash": daily_cash,
+            "holdings": daily_values.sum(axis=1),
+            "equity": equity,
+            "contributions": np.cumsum(daily_flows),
+        }, index=days)
+        for a, key in enumerate(assets):
+            daily[f"shares_{key}"] = daily_shares[:, a]
+            daily[f"value_{key}"] = daily_values[:, a]
+
+        trades_frame = pd.DataFrame(trades, columns=["date", "asset", "side", "shares", "price", "value", "commission",
+                                                     "spread_cost", "tax", "realized_gain"])
+        return {"daily": daily, "trades": trades_frame, "decisions": decisions,
+                "stats": self._stats(daily, daily_flows, trades_frame)}
+
+    @staticmethod
+    def _stats(daily: pd.DataFrame, daily_flows: np.ndarray, trades: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Summary of a simulation. Returns are time-weighted (contributions are not counted as gains).
+        The first day is measured against the initial capital, so the costs of the first purchase count.
+        """
+        equity = daily['equity'].to_numpy()
+        returns = np.empty(len(equity))
+        returns[0] = equity[0] / daily_flows[0] - 1
+        returns[1:] = (equity[1:] - daily_flows[1:]) / equity[:-1] - 1
+        index = np.cumprod(1 + returns)
+        drawdown = index / np.maximum.accumulate(index) - 1
+
+        years = (daily.index[-1] - daily.index[0]).days / 365.25
+        average_equity = equity.mean()
+        traded = trades['value'].sum()
+        return {
+            "start": daily.index[0],
+            "end": daily.index[-1],
+            "final_equity": equity[-1],
+            "contributions": daily['contributions'].iloc[-1],
+            "net_profit": equity[-1] - daily['contributions'].iloc[-1],
+            "twr_cagr": index[-1] ** (1 / years) - 1 if years > 0 else 0.0,
+            "max_drawdown": drawdown.min(),
+            "trades": len(trades),
+            "commissions": trades['commission'].sum(),
+            "spread_costs": trades['spread_cost'].sum(),
+            "taxes": trades['tax'].sum(),
+            # Traded value relative to the average portfolio, per year (a full switch is 2: sell + buy)
+            "turnover_per_year": traded / average_equity / years if years > 0 and average_equity > 0 else 0.0,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Net-of-cost portfolio simulation of the GEM decisions.")
+    parser.add_argument("--start", default="2005-01-01", help="First date of price history (YYYY-MM-DD).")
+    parser.add_argument("--end", default=None, help="Last date of price history (default: today).")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--output", default=None, help="Optional CSV path for the daily positions, cash and equity.")
+    parser.add_argument("--trades", default=None, help="Optional CSV path for the trade list.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    start_date = pd.Timestamp(args.start)
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize()
+
+    dp = DataProvider.from_config(config)
+    prices = dp.get_closes(config['tickers'], start_date, end_date)
+
+    result = PortfolioSimulator.from_config(config).run(prices)
+    stats = result['stats']
+    # Same decisions without costs, contributions or tax, for comparison
+    gross = Backtester(config).run(prices)['stats']
+
+    print(f"Simulation {stats['start'].date()} - {stats['end'].date()}")
+    print(f"  Contributions:     {stats['contributions']:,.2f}")
+    print(f"  Final equity:      {stats['final_equity']:,.2f} (net profit {stats['net_profit']:,.2f})")
+    print(f"  CAGR (TWR, net):   {stats['twr_cagr']:.2%}   gross (backtest): {gross['cagr']:.2%}")
+    print(f"  Max drawdown:      {stats['max_drawdown']:.2%}")
+    print(f"  Trades:            {stats['trades']} (turnover {stats['turnover_per_year']:.2f} per year)")
+    print(f"  Costs:             commissions {stats['commissions']:,.2f}, spreads {stats['spread_costs']:,.2f}, "
+          f"taxes {stats['taxes']:,.2f}")
+
+    if args.output:
+        result['daily'].to_csv(args.output, index_label="date")
+        print(f"Saved daily positions to {args.output}")
+    if args.trades:
+        result['trades'].to_csv(args.trades, index=False)
+        print(f"Saved trades to {args.trades}")
+
+if __name__ == "__main__":
+    main()
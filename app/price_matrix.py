@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import struct
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence
+
+from market_calendar import MarketCalendar
+
+class PriceMatrix:
+    """
+    Compact single-file price matrix, opened with numpy.memmap.
+
+    File layout (all blocks 64-byte aligned):
+      - magic b"GEMPMX" + format version (uint16) + header length (uint32)
+      - JSON header: symbols, n_days and the offset of every block
+      - days:   int32 (n_days,), day numbers since 1970-01-01, sorted
+      - closes: float32 (n_days, n_symbols), C order, NaN where there is no bar
+      - mask:   uint8 (n_days, ceil(n_symbols / 8)), np.packbits of "has a bar"
+
+    float32 halves the size of the float64 frames (7 significant digits is
+    plenty for closes) and int32 day numbers replace the 8-byte timestamps.
+    Opening maps the file read-only: nothing is loaded until a slice is
+    touched, date/symbol slices of contiguous ranges are views (zero-copy), and
+    every process that opens the same file shares the OS page cache instead of
+    holding its own copy.
+    """
+
+    MAGIC = b"GEMPMX"
+    VERSION = 1
+    ALIGN = 64
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            prefix = f.read(len(self.MAGIC) + 6)
+            if prefix[:len(self.MAGIC)] != self.MAGIC:
+                raise ValueError(f"{path} is not a price matrix file.")
+            version, header_len = struct.unpack("<HI", prefix[len(self.MAGIC):])
+            if version != self.VERSION:
+                raise ValueError(f"Unsupported price matrix version {version} in {path}.")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.symbols: List[str] = header['symbols']
+        self.n_days = header['n_days']
+        self.n_symbols = len(self.symbols)
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._bar_days = None  # (first, last) day number with a bar per symbol, see covers()
+
+        self.days = np.memmap(path, dtype=np.int32, mode='r', offset=header['days_offset'], shape=(self.n_days,))
+        self.closes = np.memmap(path, dtype=np.float32, mode='r', offset=header['closes_offset'],
+                                shape=(self.n_days, self.n_symbols))
+        self.mask = np.memmap(path, dtype=np.uint8, mode='r', offset=header['mask_offset'],
+                              shape=(self.n_days, (self.n_symbols + 7) // 8))
+
+    @classmethod
+    def open(cls, path: str) -> "PriceMatrix":
+        return cls(path)
+
+    @classmethod
+    def write(cls, path: str, prices: pd.DataFrame) -> "PriceMatrix":
+        """
+        Writes daily closes (index: dates, columns: symbols) and returns the opened matrix.
+
+        The file is written next to path and renamed into place, so readers
+        never see a partial matrix.
+        """
+        if prices.empty:
+            raise ValueError("Cannot write an empty price matrix.")
+        prices = prices.sort_index()
+        days = pd.DatetimeIndex(prices.index).normalize().to_numpy().astype('datetime64[D]').astype(np.int64)
+        if (days.min() < np.iinfo(np.int32).min or days.max() > np.iinfo(np.int32).max):
+            raise ValueError("Dates out of range for int32 day numbers.")
+        closes = np.ascontiguousarray(prices.to_numpy(dtype=np.float32))
+        mask = np.packbits(~np.isnan(closes), axis=1)
+
+        def align(n: int) -> int:
+            return -(-n // cls.ALIGN) * cls.ALIGN
+
+        # The header holds the block offsets, which depend on the header length:
+        # size it with placeholder offsets first (the JSON only grows by digits)
+        header = {"symbols": [str(c) for c in prices.columns], "n_days": int(len(days)),
+                  "days_offset": 0, "closes_offset": 0, "mask_offset": 0}
+        header_bytes = json.dumps(header).encode("utf-8") + b" " * 64
+        days_offset = align(len(cls.MAGIC) + 6 + len(header_bytes))
+        closes_offset = align(days_offset + 4 * len(days))
+        mask_offset = align(closes_offset + closes.nbytes)
+        header.update(days_offset=days_offset, closes_offset=closes_offset, mask_offset=mask_offset)
+        header_bytes = json.dumps(header).encode("utf-8").ljust(len(header_bytes))
+
+        tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(cls.MAGIC + struct.pack("<HI", cls.VERSION, len(header_bytes)) + header_bytes)
+            for offset, block in ((days_offset, days.astype(np.int32)), (closes_offset, closes), (mask_offset, mask)):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(block.tobytes())
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.days.astype('datetime64[D]').astype('datetime64[ns]'))
+
+    def row_slice(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> slice:
+        """
+        Rows between start and end (inclusive), found by binary search on the day numbers.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.days, self._day(start), side='left'))
+        hi = self.n_days if end is None else int(np.searchsorted(self.days, self._day(end), side='right'))
+        return slice(lo, hi)
+
+    def column_positions(self, symbols: Sequence[str]):
+        """
+        Column indexer for symbols: a slice when they form a contiguous run (keeps views zero-copy),
+        otherwise an index array. Unknown symbols raise ValueError.
+        """
+        missing = [s for s in symbols if s not in self._positions]
+        if missing:
+            raise ValueError(f"Symbols not in price matrix {self.path}: {missing}")
+        positions = np.array([self._positions[s] for s in symbols], dtype=np.int64)
+        if len(positions) and np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+            return slice(int(positions[0]), int(positions[0]) + len(positions))
+        return positions
+
+    def window(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+               symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        float32 closes for a date range and symbols. A view into the mapped file
+        when the symbols are contiguous (or all), otherwise a copy of just that slice.
+        """
+        rows = self.row_slice(start, end)
+        if symbols is None:
+            return self.closes[rows]
+        return self.closes[rows][:, self.column_positions(symbols)]
+
+    def valid(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+              symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Boolean "has a bar" mask for the same selection as window(), unpacked only for the selected rows.
+        """
+        rows = self.row_slice(start, end)
+        mask = np.unpackbits(self.mask[rows], axis=1, count=self.n_symbols).astype(bool)
+        if symbols is None:
+            return mask
+        return mask[:, self.column_positions(symbols)]
+
+    def coverage(self) -> pd.DataFrame:
+        """
+        First and last date with a bar, per symbol.
+        """
+        valid = np.unpackbits(self.mask, axis=1, count=self.n_symbols).astype(bool)
+        has_any = valid.any(axis=0)
+        first = np.where(has_any, valid.argmax(axis=0), -1)
+        last = np.where(has_any, self.n_days - 1 - valid[::-1].argmax(axis=0), -1)
+        dates = self.dates
+        return pd.DataFrame({
+            "start": [dates[i] if i >= 0 else pd.NaT for i in first],
+            "end": [dates[i] if i >= 0 else pd.NaT for i in last],
+        }, index=self.symbols)
+
+    def to_frame(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+                 symbols: Optional[Sequence[str]] = None, keys: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Closes as a float32 DataFrame (the format DataProvider.get_closes returns).
+
+        Args:
+            keys: Optional {key: symbol} map (e.g. config tickers); columns are renamed to the keys.
+        """
+        if keys is not None:
+            symbols = list(keys.values())
+        symbols = list(symbols) if symbols is not None else self.symbols
+        rows = self.row_slice(start, end)
+        frame = pd.DataFrame(self.window(start, end, symbols), index=self.dates[rows], columns=symbols, copy=False)
+        frame.index.name = "Date"
+        if keys is not None:
+            frame = frame.rename(columns={v: k for k, v in keys.items()})
+        return frame
+
+    def covers(self, symbols: Sequence[str], start: pd.Timestamp, end: pd.Timestamp) -> bool:
+        """
+        True if every symbol is in the matrix with bars over start..end: its first bar
+        on or before the first session of the range and its last bar on or after the
+        last one. The matrix dates alone are not enough, a symbol can stop early or
+        start late inside them (NaN rows).
+        """
+        if any(s not in self._positions for s in symbols):
+            return False
+        try:
+            sessions = MarketCalendar.sessions(start, end)
+        except ValueError:
+            return False
+        if sessions.empty:
+            return False
+
+        if self._bar_days is None:
+            valid = np.unpackbits(self.mask, axis=1, count=self.n_symbols).astype(bool)
+            has_any = valid.any(axis=0)
+            first = np.where(has_any, self.days[valid.argmax(axis=0)], np.iinfo(np.int32).max)
+            last = np.where(has_any, self.days[self.n_days - 1 - valid[::-1].argmax(axis=0)], np.iinfo(np.int32).min)
+            self._bar_days = (first, last)
+        first, last = self._bar_days
+        positions = [self._positions[s] for s in symbols]
+        return bool((first[positions] <= self._day(sessions[0])).all() and (last[positions] >= self._day(sessions[-1])).all())
+
+    @staticmethod
+    def _day(value) -> int:
+        return int(np.datetime64(pd.Timestamp(value).normalize().date(), 'D').astype(np.int64))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect a memory-mapped price matrix.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Fetch closes (through the price store) and write a matrix file.")
+    build.add_argument("--config", default="app/config/config.yaml")
+    build.add_argument("--output", default=None, help="Matrix path (default: data.matrix_path).")
+    build.add_argument("--start", default="2000-01-01")
+    build.add_argument("--end", default=None, help="Last date (default: today).")
+    build.add_argument("--symbol", action="append", default=[],
+                       help="Symbol to include (default: config tickers plus all sweep universes).")
+
+    info = subparsers.add_parser("info", help="Print shape, size and per-symbol coverage of a matrix file.")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        matrix = PriceMatrix.open(args.path)
+        print(f"{args.path}: {matrix.n_days} days x {matrix.n_symbols} symbols, {os.path.getsize(args.path) / 1e6:.2f} MB")
+        print(matrix.coverage())
+        return
+
+    import yaml
+    from data_provider import DataProvider
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+
+    symbols = args.symbol or list(dict.fromkeys(
+        list(config['tickers'].values())
+        + [s for tickers in config.get('sweep', {}).get('universes', {}).values() for s in tickers.values()]
+    ))
+    output = args.output or config.get('data', {}).get('matrix_path', 'app/data/prices.pxm')
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize()
+
+    # The matrix is a read-optimized snapshot; the price store stays the source of truth
+    prices = DataProvider.from_config(config).get_closes({s: s for s in symbols}, pd.Timestamp(args.start), end_date)
+    matrix = PriceMatrix.write(output, prices)
+    print(f"Wrote {output}: {matrix.n_days} days x {matrix.n_symbols} symbols, {os.path.getsize(output) / 1e6:.2f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+class PriceStore:
+    """
+    Local on-disk store of daily close prices (SQLite), keyed by symbol and date.
+
+    Next to the prices it keeps the date range that was already fetched for every
+    symbol ("coverage"), so covered dates are not fetched again on the next run.
+    Only ranges that returned data (or contain no trading session at all) are
+    marked as covered: a range that came back empty, e.g. dates before listing
+    or a failed request, stays missing and is requested again on every run.
+
+    Closes are Yahoo's back-adjusted closes, so a new dividend or split changes
+    every stored bar by one factor; DataProvider re-fetches an overlap bar on
+    each sync and rescales the symbol's history when it differs (see rescale).
+    """
+
+    def __init__(self, path: str = "app/data/prices.sqlite"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # The connection may be used from another thread than the one that opened it
+        # (e.g. the decision service refreshes prices in an executor); the lock
+        # serializes access to it
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS closes (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                close REAL NOT NULL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS coverage (
+                symbol TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def get_coverage(self, symbol: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Returns the (start, end) date range already fetched for the symbol, or None.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT start, end FROM coverage WHERE symbol = ?", (symbol,)).fetchone()
+        if row is None:
+            return None
+        return pd.Timestamp(row[0]), pd.Timestamp(row[1])
+
+    def missing_ranges(self, symbol: str, start_date: pd.Timestamp, end_date: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Calculates the date ranges between start_date and end_date that are not covered yet.
+
+        Coverage only grows through write(), so a range whose fetch returned no
+        data is reported as missing again on the next call.
+
+        Returns:
+            List of (start, end) tuples (inclusive), empty if everything is on disk.
+        """
+        start_date = pd.Timestamp(start_date).normalize()
+        end_date = pd.Timestamp(end_date).normalize()
+
+        coverage = self.get_coverage(symbol)
+        if coverage is None:
+            return [(start_date, end_date)]
+
+        cov_start, cov_end = coverage
+        ranges = []
+        if start_date < cov_start:
+            ranges.append((start_date, min(end_date, cov_start - pd.Timedelta(days=1))))
+        if end_date > cov_end:
+            ranges.append((max(start_date, cov_end + pd.Timedelta(days=1)), end_date))
+        return ranges
+
+    def last_bar(self, symbol: str, on_or_before: pd.Timestamp) -> Optional[Tuple[pd.Timestamp, float]]:
+        """
+        Returns (date, close) of the last stored bar on or before the date, or None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT date, close FROM closes WHERE symbol = ? AND date <= ? ORDER BY date DESC LIMIT 1",
+                (symbol, pd.Timestamp(on_or_before).strftime('%Y-%m-%d'))
+            ).fetchone()
+        return None if row is None else (pd.Timestamp(row[0]), row[1])
+
+    def first_bar(self, symbol: str) -> Optional[Tuple[pd.Timestamp, float]]:
+        """
+        Returns (date, close) of the first stored bar, or None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT date, close FROM closes WHERE symbol = ? ORDER BY date LIMIT 1", (symbol,)
+            ).fetchone()
+        return None if row is None else (pd.Timestamp(row[0]), row[1])
+
+    def rescale(self, symbol: str, factor: float):
+        """
+        Multiplies every stored close of the symbol by factor (new back-adjustment after a dividend or split).
+        """
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE closes SET close = close * ? WHERE symbol = ?", (factor, symbol))
+
+    def write(self, symbol: str, closes: pd.Series, start_date: pd.Timestamp, end_date: pd.Timestamp):
+        """
+        Upserts fetched closes for one symbol and extends its coverage by [start_date, end_date].
+
+        The fetched range is expected to be adjacent to (or overlap) the existing coverage,
+        which is always the case for ranges returned by missing_ranges.
+        """
+        closes = closes.dropna()
+        rows = [(symbol, ts.strftime('%Y-%m-%d'), float(value)) for ts, value in closes.items()]
+
+        start_str = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end_str = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO closes (symbol, date, close) VALUES (?, ?, ?)", rows
+            )
+            self.conn.execute(
+                """
+                INSERT INTO coverage (symbol, start, end) VALUES (?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    start = MIN(start, excluded.start),
+                    end = MAX(end, excluded.end)
+                """,
+                (symbol, start_str, end_str)
+            )
+
+    def read(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        """
+        Reads closes for the given symbols between start_date and end_date (inclusive).
+
+        Returns:
+            pd.DataFrame: Dates as DatetimeIndex, one column per symbol.
+        """
+        placeholders = ",".join("?" for _ in symbols)
+        query = (
+            f"SELECT date, symbol, close FROM closes "
+            f"WHERE symbol IN ({placeholders}) AND date BETWEEN ? AND ? ORDER BY date"
+        )
+        params = list(symbols) + [pd.Timestamp(start_date).strftime('%Y-%m-%d'), pd.Timestamp(end_date).strftime('%Y-%m-%d')]
+        with self._lock:
+            rows = pd.read_sql_query(query, self.conn, params=params)
+
+        closes = rows.pivot(index='date', columns='symbol', values='close')
+        closes.index = pd.to_datetime(closes.index)
+        closes.index.name = 'Date'
+        closes.columns.name = None
+
+        # Keep the requested column order, symbols without data become NaN columns
+        return closes.reindex(columns=list(symbols))
@@ -1,7 +1,7 @@
 import os
 import pandas as pd
 from datetime import date
-from typing import Dict
+from typing import Dict, List
 
 class Reporter:
     def __init__(self, output_dir: str = "app/reports"):
@@ -9,10 +9,16 @@ class Reporter:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-    def generate_report_content(self, decision: Dict, analysis_date: pd.Timestamp, tickers_map: Dict[str, str]) -> str:
+    def generate_report_content(self, decision: Dict, analysis_date: pd.Timestamp, tickers_map: Dict[str, str],
+                                quality=None) -> str:
         """
         Generates the Markdown content for the report.
+
+        quality: optional data_quality.ValidationResult, rendered as a data-quality section.
         """
+        if decision.get('engine'):
+            return self._rotation_report(decision, analysis_date, tickers_map, quality)
+
         mode = decision['mode']
         selected = decision['selected_asset_key']
         ticker = decision['selected_ticker']
@@ -25,6 +31,12 @@ class Reporter:
         us_signal = "BUY" if selected == "US" else "HOLD/SELL"
         exus_signal = "BUY" if selected == "EXUS" else "HOLD/SELL"
         bonds_signal = "BUY" if selected == "BONDS" else "HOLD/SELL"
+
+        # Momentum horizon: single window (e.g. "12M") or a blend of several
+        label = decision.get('momentum_label', '12M')
+        blended = label == "Blend"
+        return_header = "Momentum (blend)" if blended else f"Zwrot {label}"
+        table_title = "Momentum łączone" if blended else f"{label.rstrip('M')} Miesięcy"
         
         # Build Markdown
         report = f"""# GEM ETF – Decyzja za {analysis_date.strftime('%Y-%m')}
@@ -53,26 +65,171 @@ Na podstawie danych z zamknięcia miesiąca, strategia GEM wskazuje, aby w nadch
 
 ---
 
-## 3. Tabela Wyników (12 Miesięcy)
+## 3. Tabela Wyników ({table_title})
 
-| Klasa | Ticker | Zwrot 12M | Decyzja |
+| Klasa | Ticker | {return_header} | Decyzja |
 |-------|--------|-----------|---------|
 | US Equities | {tickers_map['US']} | {fmt_pct(mom['US'])} | {us_signal if mode == 'RISK-ON' else '-'} |
 | Int'l Equities | {tickers_map['EXUS']} | {fmt_pct(mom['EXUS'])} | {exus_signal if mode == 'RISK-ON' else '-'} |
 | Bonds | {tickers_map['BONDS']} | {fmt_pct(mom['BONDS'])} | {bonds_signal if mode == 'RISK-OFF' else '-'} |
 | Cash Proxy | {tickers_map['CASH_PROXY']} | {fmt_pct(mom['CASH_PROXY'])} | (Benchmark) |
-
+{self._components_section(decision) if blended else ""}{self._quality_section(quality, tickers_map, 5 if blended else 4) if quality is not None else ""}
 ---
 *Wygenerowano automatycznie przez GEM ETF Decision App.*
 """
         return report
 
+    def _rotation_report(self, decision: Dict, analysis_date: pd.Timestamp, tickers_map: Dict[str, str],
+                         quality=None) -> str:
+        """
+        Report for a custom rotation (strategy.engine): the same sections as GEM, with a
+        ranking of every asset instead of the fixed four-row table.
+        """
+        mode = decision['mode']
+        mom = decision['momentum']
+        engine = decision['engine']
+        selected = decision['selected_assets']
+        signal, benchmark = engine['risk_signal'], engine['benchmark']
+
+        fmt_pct = lambda x: "-" if pd.isna(x) else f"{x:.2%}"
+        label = decision.get('momentum_label', '12M')
+        blended = label == "Blend"
+        return_header = "Momentum (blend)" if blended else f"Zwrot {label}"
+        table_title = "Momentum łączone" if blended else f"{label.rstrip('M')} Miesięcy"
+        picks = ", ".join(f"{tickers_map[key]} ({key})" for key in selected)
+        group = engine['equity'] if mode == 'RISK-ON' else engine['defensive']
+
+        def group_name(key: str) -> str:
+            if key in engine['equity']:
+                return "Akcje"
+            if key in engine['defensive']:
+                return "Defensywne"
+            return "Benchmark" if key == benchmark else "Sygnał"
+
+        ranking = sorted(mom, key=lambda key: (pd.isna(mom[key]), -(mom[key] if not pd.isna(mom[key]) else 0)))
+        rows_md = "\n".join(
+            f"| {rank} | {key} | {tickers_map[key]} | {group_name(key)} | {fmt_pct(mom[key])} "
+            f"| {'BUY' if key in selected else '(Benchmark)' if key == benchmark else '-'} |"
+            for rank, key in enumerate(ranking, start=1)
+        )
+
+        return f"""# GEM ETF – Decyzja za {analysis_date.strftime('%Y-%m')}
+
+**Data analizy (punkt pomiaru):** {analysis_date.strftime('%Y-%m-%d')}
+**Decyzja:** **{picks}**
+**Tryb:** **{mode}**
+
+---
+
+## 1. Rekomendacja
+Na podstawie danych z zamknięcia miesiąca, strategia wskazuje, aby w nadchodzącym miesiącu ulokować kapitał{' (równymi częściami)' if len(selected) > 1 else ''} w:
+# **{", ".join(decision['selected_tickers'])}**
+
+## 2. Uzasadnienie (Momentum absolutne i względne)
+1. **Analiza Rynku ({signal} vs {benchmark}):**
+   - Zwrot {signal}: {fmt_pct(mom[signal])}
+   - Zwrot {benchmark}: {fmt_pct(mom[benchmark])}
+   - **Wynik:** {"Rynek silniejszy od benchmarku (RISK-ON)" if mode == 'RISK-ON' else "Rynek słabszy od benchmarku (RISK-OFF)"}
+
+2. **Wybór Aktywów:**
+   {'Tryb RISK-ON: najsilniejsze aktywa z grupy akcji' if mode == 'RISK-ON' else 'Tryb RISK-OFF: najsilniejsze aktywa z grupy defensywnej'} ({", ".join(group)}).
+   - **Wybrano:** {", ".join(selected)}
+
+---
+
+## 3. Ranking ({table_title})
+
+| # | Klasa | Ticker | Grupa | {return_header} | Decyzja |
+|---|-------|--------|-------|-----------|---------|
+{rows_md}
+{self._quality_section(quality, tickers_map, 4) if quality is not None else ""}
+---
+*Wygenerowano automatycznie przez GEM ETF Decision App.*
+"""
+
+    def _components_section(self, decision: Dict) -> str:
+        """
+        Table with the return of every momentum horizon that makes up the blend.
+        """
+        fmt_pct = lambda x: f"{x:.2%}"
+        weights = decision.get('component_weights', {})
+
+        rows = []
+        for label, values in decision['components'].items():
+            rows.append(
+                f"| {label} | {weights.get(label, 0):.0%} | {fmt_pct(values['US'])} | {fmt_pct(values['EXUS'])} "
+                f"| {fmt_pct(values['BONDS'])} | {fmt_pct(values['CASH_PROXY'])} |"
+            )
+        rows_md = "\n".join(rows)
+        return f"""
+## 4. Składowe Momentum
+
+| Horyzont | Waga | US | EXUS | Bonds | Cash |
+|----------|------|----|------|-------|------|
+{rows_md}
+"""
+
+    def _quality_section(self, quality, tickers_map: Dict[str, str], number: int) -> str:
+        """
+        Data-quality checks run on the prices behind this decision.
+        """
+        errors, warnings = quality.count("error"), quality.count("warning")
+        if errors:
+            status = f"**Błędy: {errors}**, ostrzeżenia: {warnings}"
+        elif warnings:
+            status = f"Ostrzeżenia: {warnings}"
+        else:
+            status = "OK"
+
+        rows = []
+        for key, stats in quality.summary.iterrows():
+            lookup = "-" if pd.isna(stats['max_lookup_days']) else f"{stats['max_lookup_days']:.0f}"
+            rows.append(
+                f"| {key} | {tickers_map.get(key, key)} | {stats['coverage']:.1%} | {stats['longest_gap']:.0f} "
+                f"| {stats['stale_sessions']:.0f} | {stats['max_abs_return']:.1%} | {lookup} |"
+            )
+        rows_md = "\n".join(rows)
+
+        issues = [i for i in quality.issues if i['severity'] != "info"]
+        issues_md = "\n".join(
+            f"- [{i['severity']}] {i['check']}{' ' + i['column'] if i['column'] else ''}: {i['detail']}" for i in issues
+        )
+        return f"""
+## {number}. Jakość Danych
+
+**Status:** {status}
+
+| Klasa | Ticker | Pokrycie sesji | Najdłuższa luka | Sesje od ostatniej ceny | Max ruch dzienny | Odległość punktu (dni) |
+|-------|--------|----------------|-----------------|-------------------------|------------------|------------------------|
+{rows_md}
+{chr(10) + issues_md + chr(10) if issues else ""}"""
+
     def save_report(self, content: str, date_str: str) -> str:
         """
         Saves the report to disk.
         """
-        filename = f"{date_str}.md"
-        path = os.path.join(self.output_dir, filename)
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return path
+        return self.save_reports({date_str: content})[0]
+
+    def save_reports(self, reports: Dict[str, str]) -> List[str]:
+        """
+        Saves many reports ({'YYYY-MM': content}) atomically.
+
+        All contents are written to temporary files first and only then renamed
+        into place, so an interrupted run never leaves a truncated report.
+        """
+        staged = []
+        try:
+            for date_str, content in reports.items():
+                path = os.path.join(self.output_dir, f"{date_str}.md")
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                staged.append((tmp_path, path))
+        except BaseException:
+            for tmp_path, _ in staged:
+                os.remove(tmp_path)
+            raise
+
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
+        return [path for _, path in staged]
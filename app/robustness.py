@@ -0,0 +1,265 @@
+import argparse
+import os
+import yaml
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from as_of_index import AsOfIndex
+from data_provider import DataProvider
+from history_store import HistoryStore
+from strategy_gem import GemStrategy
+
+def _evaluate_paths(config: Dict, monthly_prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Applies the GEM rule to a batch of simulated month-end price paths.
+
+    Args:
+        monthly_prices: (paths, months, assets) closes, assets in GemStrategy.engine.assets order.
+
+    Returns:
+        Dict with per-path 'cagr', 'max_drawdown', 'switches_per_year' and the
+        (paths, decision months) 'selected' asset indices.
+    """
+    strategy = GemStrategy(config)
+    n_paths, n_months, n_assets = monthly_prices.shape
+    first = strategy.momentum.max_months
+
+    # BlendedMomentum works along axis 0, so months go first: (months, paths, assets)
+    by_month = monthly_prices.transpose(1, 0, 2)
+    momentum = strategy.momentum.blend(strategy.momentum.components(by_month))[first:]
+    result = strategy.engine.select(momentum.reshape(-1, n_assets))
+    selected = result['selected'][:, 0].reshape(-1, n_paths).T  # (paths, decision months)
+
+    # Decision taken at month t is held over month t+1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_returns = np.log(monthly_prices[:, first + 1:] / monthly_prices[:, first:-1])
+    held = np.take_along_axis(log_returns, selected[:, :-1, None], axis=2)[:, :, 0]
+    held = np.nan_to_num(held)
+
+    log_equity = np.cumsum(held, axis=1)
+    years = held.shape[1] / 12
+    cagr = np.expm1(log_equity[:, -1] / years) if years > 0 else np.zeros(n_paths)
+    peak = np.maximum.accumulate(np.maximum(log_equity, 0.0), axis=1)
+    max_drawdown = np.expm1(log_equity - peak).min(axis=1)
+    switches = (selected[:, 1:] != selected[:, :-1]).sum(axis=1)
+
+    return {
+        "cagr": cagr,
+        "max_drawdown": max_drawdown,
+        "switches_per_year": switches / years if years > 0 else np.zeros(n_paths),
+        "selected": selected,
+    }
+
+def _bootstrap_chunk(task: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Block-bootstrap paths for one chunk (runs in a worker).
+    """
+    rng = np.random.default_rng(task['seed'])
+    log_returns = task['log_returns']  # (months - 1, assets)
+    n_paths, block = task['n_paths'], task['block_months']
+    n_steps = task['n_steps'] or len(log_returns)
+
+    # Whole months are drawn for all assets together, keeping cross-asset correlation
+    n_blocks = -(-n_steps // block)
+    starts = rng.integers(0, len(log_returns) - block + 1, size=(n_paths, n_blocks))
+    rows = (starts[:, :, None] + np.arange(block)).reshape(n_paths, -1)[:, :n_steps]
+    sampled = log_returns[rows]  # (paths, steps, assets)
+
+    log_prices = np.concatenate([np.zeros((n_paths, 1, sampled.shape[2])), np.cumsum(sampled, axis=1)], axis=1)
+    result = _evaluate_paths(task['config'], np.exp(log_prices))
+    del result['selected']
+    return result
+
+def _perturb_chunk(task: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Historical paths with price noise and jittered rebalance dates for one chunk (runs in a worker).
+    """
+    rng = np.random.default_rng(task['seed'])
+    candidates = task['candidates']  # (2 * jitter + 1, months, assets)
+    n_paths = task['n_paths']
+    n_offsets, n_months, n_assets = candidates.shape
+
+    offsets = rng.integers(0, n_offsets, size=(n_paths, n_months))
+    prices = candidates[offsets, np.arange(n_months)]  # (paths, months, assets)
+    if task['noise']:
+        prices = prices * np.exp(rng.normal(0.0, task['noise'], size=prices.shape))
+
+    result = _evaluate_paths(task['config'], prices)
+    result['flips'] = (result.pop('selected') != task['baseline']).sum(axis=0)
+    return result
+
+class RobustnessAnalysis:
+    """
+    Monte Carlo robustness of the GEM rule.
+
+    Two modes:
+      - bootstrap: new histories are assembled from blocks of real monthly
+        returns (block_months long, all assets together). Shows the spread of
+        CAGR, drawdown and switching that the rule produces on plausible
+        alternative histories.
+      - perturb: the real history with every month-end close multiplied by
+        lognormal noise and the rebalance day moved by up to jitter_sessions
+        sessions. Shows how often each historical decision flips.
+
+    Paths are simulated as (paths x months x assets) arrays in chunks of
+    chunk_size (bounding memory per worker) spread across a process pool.
+    """
+
+    def __init__(self, config: Dict, n_paths: int = 10000, chunk_size: int = 1000, workers: Optional[int] = None, seed: int = 0):
+        self.config = config
+        self.n_paths = n_paths
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.seed = seed
+        self.strategy = GemStrategy(config)
+
+    def _chunks(self) -> List[tuple]:
+        seeds = np.random.SeedSequence(self.seed).spawn(-(-self.n_paths // self.chunk_size))
+        sizes = [min(self.chunk_size, self.n_paths - i * self.chunk_size) for i in range(len(seeds))]
+        return list(zip(sizes, seeds))
+
+    def _run(self, worker, tasks: List[Dict]) -> List[Dict[str, np.ndarray]]:
+        if self.workers == 1:
+            return [worker(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers or os.cpu_count()) as pool:
+            return list(pool.map(worker, tasks))
+
+    def _month_ends(self, prices: pd.DataFrame) -> tuple:
+        """
+        As-of index of the daily closes (engine asset order) and the row positions
+        of the month-ends from the first one where every asset has a price.
+        """
+        index = AsOfIndex(prices.reindex(columns=self.strategy.engine.assets).dropna(how='all'))
+        complete = ~np.isnan(index.values[index.month_end_positions]).any(axis=1)
+        if complete.sum() <= self.strategy.momentum.max_months + 1:
+            raise ValueError("Not enough month-ends with prices for all assets.")
+        return index, index.month_end_positions[np.argmax(complete):]
+
+    def bootstrap(self, prices: pd.DataFrame, block_months: int = 12, n_months: Optional[int] = None) -> pd.DataFrame:
+        """
+        Per-path stats (cagr, max_drawdown, switches_per_year) for block-bootstrapped histories.
+
+        Args:
+            prices: Daily closes, columns are the ticker keys.
+            block_months: Length of the resampled blocks (keeps momentum-relevant autocorrelation).
+            n_months: Months per simulated path (default: length of the real history).
+
+        Raises:
+            ValueError: n_months leaves no month after the longest lookback window.
+        """
+        max_months = self.strategy.momentum.max_months
+        if n_months is not None and n_months <= max_months + 1:
+            raise ValueError(f"n_months must be greater than {max_months + 1} (longest lookback {max_months} months "
+                             f"plus one month held), got {n_months}.")
+        index, positions = self._month_ends(prices)
+        monthly = index.values[positions]
+        log_returns = np.diff(np.log(monthly), axis=0)
+        block_months = min(block_months, len(log_returns))
+
+        tasks = [{
+            "config": self.config, "log_returns": log_returns, "n_paths": size, "seed": seed,
+            "block_months": block_months, "n_steps": n_months - 1 if n_months else None,
+        } for size, seed in self._chunks()]
+
+        results = self._run(_bootstrap_chunk, tasks)
+        return pd.DataFrame({key: np.concatenate([r[key] for r in results]) for key in results[0]})
+
+    def perturb(self, prices: pd.DataFrame, noise: float = 0.005, jitter_sessions: int = 2) -> Dict[str, pd.DataFrame]:
+        """
+        Decision stability under price noise and shifted rebalance dates.
+
+        Args:
+            noise: Standard deviation of the multiplicative (log) noise on every close, e.g. 0.005 = 50 bp.
+            jitter_sessions: Rebalance day moves by up to this many sessions around month-end.
+
+        Returns:
+            Dict with 'paths' (per-path stats) and 'months' (baseline decision and
+            flip probability for every decision month).
+        """
+        index, positions = self._month_ends(prices)
+        offsets = np.arange(-jitter_sessions, jitter_sessions + 1)
+        rows = np.clip(positions[None, :] + offsets[:, None], 0, len(index.values) - 1)
+        candidates = index.values[rows]  # (offsets, months, assets)
+
+        baseline = _evaluate_paths(self.config, candidates[jitter_sessions][None])['selected'][0]
+        tasks = [{
+            "config": self.config, "candidates": candidates, "baseline": baseline,
+            "noise": noise, "n_paths": size, "seed": seed,
+        } for size, seed in self._chunks()]
+        results = self._run(_perturb_chunk, tasks)
+
+        paths = pd.DataFrame({key: np.concatenate([r[key] for r in results]) for key in ("cagr", "max_drawdown", "switches_per_year")})
+        assets = np.array(self.strategy.engine.assets, dtype=object)
+        months = pd.DataFrame({
+            "selected_asset_key": assets[baseline],
+            "flip_probability": sum(r['flips'] for r in results) / self.n_paths,
+        }, index=index.index[positions[self.strategy.momentum.max_months:]])
+        months.index.name = "date"
+        return {"paths": paths, "months": months}
+
+    @staticmethod
+    def summarize(paths: pd.DataFrame) -> pd.DataFrame:
+        """
+        Percentiles of every per-path statistic.
+        """
+        return paths.quantile([0.05, 0.25, 0.5, 0.75, 0.95]).T.rename(columns=lambda q: f"p{int(q * 100)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap / Monte Carlo robustness analysis of the GEM rule.")
+    parser.add_argument("--mode", choices=["bootstrap", "perturb"], default="bootstrap")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--start", default="2005-01-01", help="First date of price history (YYYY-MM-DD).")
+    parser.add_argument("--end", default=None, help="Last date of price history (default: today).")
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Paths simulated per task (bounds memory).")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--block-months", type=int, default=12, help="bootstrap: block length in months.")
+    parser.add_argument("--months", type=int, default=None, help="bootstrap: months per path (default: history length).")
+    parser.add_argument("--noise-bps", type=float, default=50.0, help="perturb: price noise (std, basis points).")
+    parser.add_argument("--jitter", type=int, default=2, help="perturb: max rebalance shift in sessions.")
+    parser.add_argument("--output", default=None, help="Optional CSV path for per-path (or per-month) results.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    start_date = pd.Timestamp(args.start)
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize()
+    prices = DataProvider.from_config(config).get_closes(config['tickers'], start_date, end_date)
+
+    analysis = RobustnessAnalysis(config, n_paths=args.paths, chunk_size=args.chunk_size, workers=args.workers, seed=args.seed)
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+        if args.mode == "bootstrap":
+            paths = analysis.bootstrap(prices, block_months=args.block_months, n_months=args.months)
+            print(f"Block bootstrap: {args.paths} paths, {args.block_months}-month blocks")
+            print(analysis.summarize(paths))
+            output = paths
+        else:
+            result = analysis.perturb(prices, noise=args.noise_bps / 10000, jitter_sessions=args.jitter)
+            months = result['months']
+            print(f"Perturbation: {args.paths} paths, noise {args.noise_bps:.0f} bp, rebalance ±{args.jitter} sessions")
+            print(analysis.summarize(result['paths']))
+            print(f"\nDecision flip probability: mean {months['flip_probability'].mean():.2%}, "
+                  f"months with > 10%: {(months['flip_probability'] > 0.1).sum()} of {len(months)}")
+
+            # Fragility of the decisions actually recorded in the history
+            history_config = config.get('history', {})
+            store = HistoryStore(db_path=history_config.get('db_path', 'app/data/history.sqlite'),
+                                 csv_path=history_config.get('csv_path', 'app/decisions.csv'))
+            history = store.read()
+            store.close()
+            recorded = months.reindex(history.index).dropna()
+            if len(recorded):
+                recorded['recorded_asset'] = history.loc[recorded.index, 'selected_asset']
+                print("\nRecorded decisions:")
+                print(recorded)
+            output = months
+
+    if args.output:
+        output.to_csv(args.output)
+        print(f"Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
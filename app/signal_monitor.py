@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+from collections import deque
+from datetime import date
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from data_provider import DataProvider
+from market_calendar import MarketCalendar
+
+class RollingMomentum:
+    """
+    Rolling lookback-month momentum per asset, updated one daily bar at a time.
+
+    Keeps the daily closes from the as-of anchor (last bar on or before
+    t - lookback_months) up to the latest bar t. A new bar is appended and the
+    bars that fell out of the window are dropped from the front, so every update
+    costs O(assets) (amortized) instead of a recompute over the whole window.
+    Momentum is P(t) / P(anchor) - 1, the same as-of rule as the monthly run.
+    """
+
+    def __init__(self, assets: List[str], lookback_months: int):
+        self.assets = list(assets)
+        self.lookback_months = lookback_months
+        self.window = deque()  # (date, closes) pairs, oldest first
+        self.last_date: Optional[pd.Timestamp] = None
+        self._last_closes = np.full(len(self.assets), np.nan)
+
+    def update(self, bar_date: pd.Timestamp, closes: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Adds the bar for bar_date (closes in self.assets order).
+
+        Missing closes (NaN) carry the previous close forward. Bars on or before
+        last_date are ignored, so overlapping fetches can be replayed safely.
+
+        Returns:
+            Momentum per asset, or None while the window is shorter than lookback_months.
+        """
+        bar_date = pd.Timestamp(bar_date)
+        if self.last_date is not None and bar_date <= self.last_date:
+            return self.momentum()
+
+        closes = np.asarray(closes, dtype=np.float64)
+        closes = np.where(np.isnan(closes), self._last_closes, closes)
+        self._last_closes = closes
+        self.last_date = bar_date
+        self.window.append((bar_date, closes))
+
+        anchor = bar_date - pd.DateOffset(months=self.lookback_months)
+        while len(self.window) > 1 and self.window[1][0] <= anchor:
+            self.window.popleft()
+        return self.momentum()
+
+    def momentum(self) -> Optional[np.ndarray]:
+        if not self.window:
+            return None
+        anchor_date, anchor_closes = self.window[0]
+        if anchor_date > self.last_date - pd.DateOffset(months=self.lookback_months):
+            return None
+        return self._last_closes / anchor_closes - 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "assets": self.assets,
+            "lookback_months": self.lookback_months,
+            "window": [[d.strftime('%Y-%m-%d'), [None if np.isnan(v) else float(v) for v in c]] for d, c in self.window],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingMomentum":
+        rolling = cls(data['assets'], data['lookback_months'])
+        for bar_date, closes in data['window']:
+            rolling.window.append((pd.Timestamp(bar_date), np.array(closes, dtype=np.float64)))
+        if rolling.window:
+            rolling.last_date, rolling._last_closes = rolling.window[-1]
+        return rolling
+
+class SignalMonitor:
+    """
+    Daily early-warning monitor for the GEM signals.
+
+    Watches the two comparisons behind the monthly decision:
+      - regime: US vs CASH_PROXY momentum (RISK-ON / RISK-OFF)
+      - leader: US vs EXUS momentum (tie goes to strategy.tie_break)
+    and raises an alert when either flips, or when its spread gets within
+    `margin` of flipping (once per approach, not every day it stays close).
+
+    The rolling window and the last signals are persisted as JSON between runs,
+    so a daily run only needs the bars since the previous one (normally served
+    from the local price store).
+    """
+
+    ASSETS = ['US', 'EXUS', 'BONDS', 'CASH_PROXY']
+
+    def __init__(self, config: Dict, state_path: str = "app/data/monitor_state.json", margin: float = 0.01):
+        self.config = config
+        self.state_path = state_path
+        self.margin = margin
+        self.lookback_months = config['strategy']['lookback_months']
+        self.tie_break = config['strategy'].get('tie_break', 'US')
+        if self.tie_break not in ('US', 'EXUS'):
+            raise ValueError(f"Unknown tie_break '{self.tie_break}', expected 'US' or 'EXUS'.")
+
+        self.rolling = RollingMomentum(self.ASSETS, self.lookback_months)
+        self.signals: Optional[Dict[str, Any]] = None
+        self._load_state()
+
+    def _load_state(self):
+        if not os.path.isfile(self.state_path):
+            return
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        rolling = state.get('rolling', {})
+        # A changed lookback or asset list invalidates the window; rebuild from scratch
+        if rolling.get('lookback_months') != self.lookback_months or rolling.get('assets') != self.ASSETS:
+            print(f"Monitor state in {self.state_path} does not match the config, rebuilding.")
+            return
+        self.rolling = RollingMomentum.from_dict(rolling)
+        self.signals = state.get('signals')
+
+    def save_state(self):
+        """
+        Writes the rolling window and the last signals, replacing the file atomically.
+        """
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rolling": self.rolling.to_dict(), "signals": self.signals}, f, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def fetch_start(self, end_date: pd.Timestamp) -> pd.Timestamp:
+        """
+        First date to fetch: the day after the last processed bar, or a full
+        lookback window (plus a month of buffer) when there is no state yet.
+        """
+        if self.rolling.last_date is not None:
+            return self.rolling.last_date + pd.Timedelta(days=1)
+        return end_date - pd.DateOffset(months=self.lookback_months + 1)
+
+    def classify(self, momentum: np.ndarray) -> Dict[str, Any]:
+        """
+        Regime and leader with their spreads for one momentum vector.
+        """
+        mom = dict(zip(self.ASSETS, momentum.tolist()))
+        regime_spread = mom['US'] - mom['CASH_PROXY']
+        leader_spread = mom['US'] - mom['EXUS']
+        if leader_spread > 0:
+            leader = 'US'
+        elif leader_spread < 0:
+            leader = 'EXUS'
+        else:
+            leader = self.tie_break
+        return {
+            "regime": "RISK-ON" if regime_spread > 0 else "RISK-OFF",
+            "regime_spread": regime_spread,
+            "regime_near": abs(regime_spread) < self.margin,
+            "leader": leader,
+            "leader_spread": leader_spread,
+            "leader_near": abs(leader_spread) < self.margin,
+            "momentum": mom,
+        }
+
+    def _events(self, prev: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+        events = []
+        for name in ('regime', 'leader'):
+            if current[name] != prev[name]:
+                events.append(f"{name}_flip")
+            elif current[f"{name}_near"] and not prev[f"{name}_near"]:
+                events.append(f"{name}_near")
+        return events
+
+    def update(self, closes: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Feeds new daily closes (columns: asset keys) through the rolling window.
+
+        Returns:
+            One alert per bar on which a signal flipped or came within the margin.
+            A run that starts without signals (first run, rebuild) only seeds them
+            and never alerts, not even for the later bars of the same run.
+        """
+        values = closes.reindex(columns=self.ASSETS).to_numpy(dtype=np.float64)
+        seeding = self.signals is None
+        alerts = []
+        for bar_date, row in zip(closes.index, values):
+            if self.rolling.last_date is not None and bar_date <= self.rolling.last_date:
+                continue
+            momentum = self.rolling.update(bar_date, row)
+            if momentum is None or np.isnan(momentum).any():
+                continue
+
+            current = self.classify(momentum)
+            current["date"] = bar_date.strftime('%Y-%m-%d')
+            if not seeding:
+                events = self._events(self.signals, current)
+                if events:
+                    alerts.append({"events": events, "previous": self.signals, "current": current})
+            self.signals = current
+        return alerts
+
+    def format_alert(self, alerts: List[Dict[str, Any]]) -> str:
+        """
+        Markdown body for the alert email (the latest processed bar decides the tables,
+        the same bar as the subject, even when it raised no alert itself).
+        """
+        fmt_pct = lambda x: f"{x:+.2%}"
+        latest = self.signals
+        tickers = self.config['tickers']
+
+        lines = []
+        for alert in alerts:
+            current, previous = alert['current'], alert['previous']
+            for event in alert['events']:
+                name, kind = event.split('_')
+                title = "Reżim (US vs Cash)" if name == 'regime' else "Lider (US vs EXUS)"
+                spread = fmt_pct(current[f"{name}_spread"])
+                if kind == 'flip':
+                    lines.append(f"- {current['date']} **{title}:** zmiana {previous[name]} → **{current[name]}** (różnica {spread})")
+                else:
+                    lines.append(f"- {current['date']} **{title}:** {current[name]}, blisko zmiany (różnica {spread}, próg ±{self.margin:.2%})")
+
+        rows = "\n".join(
+            f"| {key} | {tickers[key]} | {fmt_pct(latest['momentum'][key])} |" for key in self.ASSETS
+        )
+        return f"""# GEM ETF – Alert dzienny {latest['date']}
+
+**Reżim:** **{latest['regime']}** (US - Cash: {fmt_pct(latest['regime_spread'])})
+**Lider akcji:** **{latest['leader']}** (US - EXUS: {fmt_pct(latest['leader_spread'])})
+
+---
+
+## Zmiany sygnałów
+{chr(10).join(lines)}
+
+## Momentum {self.lookback_months}M (dzienne)
+
+| Klasa | Ticker | Zwrot {self.lookback_months}M |
+|-------|--------|-----------|
+{rows}
+
+---
+*Sygnał informacyjny w trakcie miesiąca. Decyzja obowiązuje na koniec miesiąca.*
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily GEM signal monitor (alerts on regime/leader flips).")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--end", default=None, help="Last bar to process (default: yesterday).")
+    parser.add_argument("--dry-run", action="store_true", help="Print alerts instead of emailing them.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+
+    monitor_config = config.get('monitor', {})
+    monitor = SignalMonitor(
+        config,
+        state_path=monitor_config.get('state_path', 'app/data/monitor_state.json'),
+        margin=monitor_config.get('margin', 0.01),
+    )
+
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp(date.today()) - pd.Timedelta(days=1)
+    start_date = monitor.fetch_start(end_date)
+    # Weekends and holidays have no new bars: nothing to fetch
+    if start_date > end_date or MarketCalendar.sessions(start_date, end_date).empty:
+        print(f"Monitor is up to date ({monitor.rolling.last_date.date()}). Nothing to do.")
+        return
+
+    tickers = {key: config['tickers'][key] for key in SignalMonitor.ASSETS}
+    closes = DataProvider.from_config(config).get_closes(tickers, start_date, end_date)
+    alerts = monitor.update(closes)
+
+    if monitor.signals:
+        s = monitor.signals
+        print(f"{s['date']}: {s['regime']} (US - Cash {s['regime_spread']:+.2%}), "
+              f"leader {s['leader']} (US - EXUS {s['leader_spread']:+.2%})")
+
+    if alerts:
+        content = monitor.format_alert(alerts)
+        subject = f"{config['email']['subject_prefix']} - Alert {monitor.signals['date']} ({monitor.signals['regime']})"
+        if args.dry_run:
+            print(subject)
+            print(content)
+        else:
+            from dotenv import load_dotenv
+            from email_resend import EmailSender
+
+            load_dotenv()
+            if os.getenv("EMAIL_FROM"):
+                config['email']['from'] = os.getenv("EMAIL_FROM")
+            if os.getenv("EMAIL_TO"):
+                config['email']['to'] = os.getenv("EMAIL_TO")
+            EmailSender(config).send_email(subject, content)
+    else:
+        print("No signal changes.")
+
+    # State is saved last: if sending fails, the same bars alert again next run
+    monitor.save_state()
+
+if __name__ == "__main__":
+    main()
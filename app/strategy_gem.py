@@ -1,65 +1,158 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, List, Any
+
+from momentum_engine import MomentumEngine, BlendedMomentum
 
 class GemStrategy:
     def __init__(self, config: Dict):
         self.tickers_map = config['tickers'] # US -> SPY, etc.
         self.lookback_months = config['strategy']['lookback_months']
+        engine_config = config['strategy'].get('engine')
+        if engine_config:
+            # Custom rotation (strategy.engine): arbitrary groups of ticker keys, ties go to
+            # the asset listed first, so tie_break does not apply
+            self.engine = MomentumEngine.from_config(engine_config)
+            missing = [key for key in self.engine.assets if key not in self.tickers_map]
+            if missing:
+                raise ValueError(f"strategy.engine uses keys missing from tickers: {missing}")
+            self.tie_break = None
+            self.is_gem = False
+        else:
+            # Asset selected when US and EXUS momentum are equal (PRD: US wins ties)
+            self.tie_break = config['strategy'].get('tie_break', 'US')
+            if self.tie_break not in ('US', 'EXUS'):
+                raise ValueError(f"Unknown tie_break '{self.tie_break}', expected 'US' or 'EXUS'.")
+
+            # GEM is the 4-asset configuration of the generic momentum engine:
+            # US vs CASH_PROXY decides the mode, then the best of US/EXUS or BONDS.
+            # The engine breaks ties by group order, so the tie-break asset goes first.
+            equity = ['US', 'EXUS'] if self.tie_break == 'US' else ['EXUS', 'US']
+            self.engine = MomentumEngine(equity=equity, defensive=['BONDS'], benchmark='CASH_PROXY', risk_signal='US')
+            self.is_gem = True
+        # Momentum horizons (strategy.horizons, default: single lookback_months return)
+        self.momentum = BlendedMomentum.from_config(config['strategy'])
 
     def calculate_decision(self, prices_t: pd.Series, prices_t_minus_12: pd.Series) -> Dict[str, Any]:
         """
         Calculates GEM decision based on two price points.
-        
+
         Args:
             prices_t: Prices at current point (month end).
             prices_t_minus_12: Prices 12 months ago.
-            
+
         Returns:
             Dict containing decision, momentum values, and context.
         """
-        
-        # 1. Calculate Returns
-        # Return = (Price_t / Price_t-12) - 1
-        returns = (prices_t / prices_t_minus_12) - 1
-        
-        us_ret = returns['US']
-        exus_ret = returns['EXUS']
-        cash_proxy_ret = returns['CASH_PROXY']
-        
-        # Ensure we handle potential missing values if needed, 
-        # but DataProvider should have handled obtaining valid prices.
-        
-        # 2. Logic
-        mode = "RISK-OFF"
-        selected_asset = "BONDS" # Default
-        
-        # Condition 1: US vs Cash
-        # PRD 4.3: If US > CASH_PROXY -> RISK-ON
-        if us_ret > cash_proxy_ret:
-            mode = "RISK-ON"
-            # Condition 2: Select max momentum (US vs EXUS)
-            if us_ret >= exus_ret:
-                selected_asset = "US"
-            else:
-                selected_asset = "EXUS"
-        else:
-            # PRD 4.2: If US <= CASH_PROXY -> RISK-OFF -> BONDS
-            mode = "RISK-OFF"
-            selected_asset = "BONDS"
-            
-        # Get the actual ticker for the selected asset
+        result = self.engine.decide(prices_t, prices_t_minus_12)
+        return self._build_decision(
+            result['risk_on'], result['selected'], result['momentum'],
+            prices_t.to_dict(), prices_t_minus_12.to_dict()
+        )
+
+    def calculate_decision_from_history(self, monthly_prices: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calculates the GEM decision with (blended) multi-horizon momentum.
+
+        Args:
+            monthly_prices: Price points one month apart, oldest first; the last row is the
+                            analysis point. Needs at least max_months + 1 rows (see self.momentum).
+
+        Returns:
+            Same dict as calculate_decision, plus 'components' (return of every horizon per
+            asset) and 'momentum_label'.
+        """
+        if len(monthly_prices) <= self.momentum.max_months:
+            raise ValueError(f"Need {self.momentum.max_months + 1} monthly price points, got {len(monthly_prices)}.")
+
+        assets = self.engine.assets
+        components = self.momentum.components(monthly_prices.reindex(columns=assets).to_numpy())
+        momentum = self.momentum.blend(components)[-1]
+
+        result = self.engine.select(momentum)
+        selected = [assets[i] for i in result['selected'][0] if i >= 0]
+
+        decision = self._build_decision(
+            bool(result['risk_on'][0]), selected, dict(zip(assets, momentum)),
+            monthly_prices.iloc[-1].to_dict(), monthly_prices.iloc[-1 - self.momentum.max_months].to_dict()
+        )
+        decision["components"] = {
+            label: dict(zip(assets, components[i, -1])) for i, label in enumerate(self.momentum.labels)
+        }
+        decision["component_weights"] = dict(zip(self.momentum.labels, self.momentum.weights.tolist()))
+        decision["momentum_label"] = "Blend" if self.momentum.is_blended else self.momentum.labels[0]
+        return decision
+
+    def _build_decision(self, risk_on: bool, selected: List[str], momentum: Dict[str, float],
+                        prices_current: Dict, prices_prev: Dict) -> Dict[str, Any]:
+        # PRD 4.3: If US > CASH_PROXY -> RISK-ON -> max momentum of US/EXUS
+        # PRD 4.2: If US <= CASH_PROXY -> RISK-OFF -> BONDS
+        mode = "RISK-ON" if risk_on else "RISK-OFF"
+
+        # Get the actual ticker for the selected asset (the best ranked one with top_k > 1)
+        selected_asset = selected[0]
         selected_ticker = self.tickers_map[selected_asset]
 
-        return {
+        decision = {
             "mode": mode,
             "selected_asset_key": selected_asset,
             "selected_ticker": selected_ticker,
-            "momentum": {
-                "US": us_ret,
-                "EXUS": exus_ret,
-                "CASH_PROXY": cash_proxy_ret,
-                "BONDS": returns.get('BONDS', 0.0)
-            },
-            "prices_current": prices_t.to_dict(),
-            "prices_prev": prices_t_minus_12.to_dict()
+            "momentum": {key: momentum[key] for key in self.engine.assets},
+            "prices_current": prices_current,
+            "prices_prev": prices_prev
         }
+        if not self.is_gem:
+            # Everything a report needs to explain a custom rotation
+            decision["selected_assets"] = list(selected)
+            decision["selected_tickers"] = [self.tickers_map[key] for key in selected]
+            decision["engine"] = {
+                "equity": self.engine.equity,
+                "defensive": self.engine.defensive,
+                "benchmark": self.engine.benchmark,
+                "risk_signal": self.engine.risk_signal,
+            }
+        return decision
+
+    def calculate_decisions(self, monthly_closes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Vectorized version of calculate_decision for a whole history of month-end closes.
+
+        Momentum windows are counted in rows (see BlendedMomentum), so monthly_closes
+        must contain exactly one row per month (the last session of each month).
+
+        Args:
+            monthly_closes: Month-end closes, columns are the ticker keys (US, EXUS, ...).
+
+        Returns:
+            pd.DataFrame indexed by month-end date with columns mode, selected_asset_key,
+            selected_ticker and momentum_<KEY> for every asset. Months without a full
+            lookback window are dropped.
+        """
+        assets = self.engine.assets
+        components = self.momentum.components(monthly_closes.reindex(columns=assets).to_numpy())
+        momentum = self.momentum.blend(components)
+        result = self.engine.select(momentum)
+
+        selected = np.array(assets, dtype=object)[result['selected'][:, 0]]
+        decisions = pd.DataFrame({
+            "mode": np.where(result['risk_on'], "RISK-ON", "RISK-OFF"),
+            "selected_asset_key": selected,
+            "selected_ticker": pd.Series(selected).map(self.tickers_map).to_numpy(),
+        }, index=monthly_closes.index)
+
+        for i, key in enumerate(assets):
+            decisions[f"momentum_{key}"] = momentum[:, i]
+        if self.momentum.is_blended:
+            for h, label in enumerate(self.momentum.labels):
+                for i, key in enumerate(assets):
+                    decisions[f"momentum_{key}_{label}"] = components[h, :, i]
+
+        if result['selected'].shape[1] > 1:
+            decisions["selected_assets"] = [
+                ",".join(assets[i] for i in row if i >= 0) for row in result['selected']
+            ]
+
+        # US, EXUS and CASH_PROXY are all needed for a GEM decision; a custom rotation
+        # needs its risk signal and benchmark (assets without data are never selected)
+        needed = ["US", "EXUS", "CASH_PROXY"] if self.is_gem else [self.engine.risk_signal, self.engine.benchmark]
+        return decisions[decisions[[f"momentum_{key}" for key in needed]].notna().all(axis=1)]
@@ -0,0 +1,179 @@
+import argparse
+import itertools
+import os
+import yaml
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Any
+
+from backtest import Backtester
+from data_provider import DataProvider
+from price_matrix import PriceMatrix
+
+# Worker-side view of the shared price matrix, set once per process by _attach_prices
+_shared = {}
+
+def _attach_prices(shm_name: str, shape: tuple, dates: np.ndarray, symbols: List[str]):
+    """
+    Process pool initializer: maps the shared price matrix without copying it.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    matrix.flags.writeable = False
+
+    _shared['shm'] = shm  # keep the mapping alive for the lifetime of the worker
+    _shared['matrix'] = matrix
+    _shared['index'] = pd.DatetimeIndex(dates)
+    _shared['columns'] = {symbol: i for i, symbol in enumerate(symbols)}
+
+def _attach_matrix(path: str):
+    """
+    Process pool initializer: maps a price matrix file (see price_matrix.py).
+    Every worker maps the same file, so they share the OS page cache.
+    """
+    matrix = PriceMatrix.open(path)
+    _shared['matrix'] = matrix.closes
+    _shared['index'] = matrix.dates
+    _shared['columns'] = {symbol: i for i, symbol in enumerate(matrix.symbols)}
+
+def _run_combination(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Backtests a single (universe, lookback, tie-break) combination in a worker.
+    """
+    tickers = params['tickers']
+    columns = [_shared['columns'][symbol] for symbol in tickers.values()]
+    prices = pd.DataFrame(_shared['matrix'][:, columns], index=_shared['index'], columns=list(tickers.keys()))
+
+    config = {
+        'tickers': tickers,
+        'strategy': {'lookback_months': params['lookback_months'], 'tie_break': params['tie_break']},
+    }
+
+    row = {
+        'universe': params['universe'],
+        'lookback_months': params['lookback_months'],
+        'tie_break': params['tie_break'],
+    }
+    try:
+        stats = Backtester(config).run(prices)['stats']
+    except ValueError as e:
+        print(f"Skipping {row}: {e}")
+        return row
+
+    row.update({
+        'start': stats['start'].date(),
+        'end': stats['end'].date(),
+        'cagr': stats['cagr'],
+        'max_drawdown': stats['max_drawdown'],
+        'turnover_per_year': stats['turnover_per_year'],
+    })
+    return row
+
+class ParameterSweep:
+    def __init__(self, sweep_config: Dict):
+        self.universes = sweep_config['universes']
+        self.lookbacks = sweep_config.get('lookback_months', [12])
+        self.tie_breaks = sweep_config.get('tie_breaks', ['US'])
+
+    def symbols(self) -> List[str]:
+        """
+        Returns the union of symbols over all universes (in first-seen order).
+        """
+        return list(dict.fromkeys(s for tickers in self.universes.values() for s in tickers.values()))
+
+    def combinations(self) -> List[Dict[str, Any]]:
+        return [
+            {'universe': name, 'tickers': tickers, 'lookback_months': lookback, 'tie_break': tie_break}
+            for (name, tickers), lookback, tie_break
+            in itertools.product(self.universes.items(), self.lookbacks, self.tie_breaks)
+        ]
+
+    def run(self, prices: pd.DataFrame, workers: int = None, rank_by: str = 'cagr') -> pd.DataFrame:
+        """
+        Backtests every combination across a process pool.
+
+        The price matrix is placed in shared memory once; workers map it read-only
+        instead of receiving a pickled DataFrame per task.
+
+        Args:
+            prices: Daily closes, one column per symbol (see symbols()).
+            workers: Number of worker processes (default: CPU count).
+            rank_by: Result column used for ranking (higher is better).
+
+        Returns:
+            pd.DataFrame: Ranked results table, one row per combination.
+        """
+        symbols = list(prices.columns)
+        matrix = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            shared = np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = matrix
+            init_args = (shm.name, matrix.shape, prices.index.to_numpy(), symbols)
+            return self._run_pool(_attach_prices, init_args, workers, rank_by)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def run_from_matrix(self, matrix_path: str, workers: int = None, rank_by: str = 'cagr') -> pd.DataFrame:
+        """
+        Same as run(), but workers map a price matrix file instead of a shared memory copy.
+        """
+        matrix = PriceMatrix.open(matrix_path)
+        missing = [s for s in self.symbols() if s not in matrix.symbols]
+        if missing:
+            raise ValueError(f"Price matrix {matrix_path} is missing symbols: {missing}")
+        return self._run_pool(_attach_matrix, (matrix_path,), workers, rank_by)
+
+    def _run_pool(self, initializer, init_args: tuple, workers: int, rank_by: str) -> pd.DataFrame:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=initializer, initargs=init_args) as pool:
+            rows = list(pool.map(_run_combination, self.combinations(), chunksize=4))
+
+        results = pd.DataFrame(rows)
+        if rank_by in results.columns:
+            results = results.sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
+            results.index = results.index + 1
+            results.index.name = 'rank'
+        return results
+
+def fetch_prices(config: Dict, sweep: ParameterSweep, args) -> pd.DataFrame:
+    start_date = pd.Timestamp(args.start or config['sweep'].get('start', '2005-01-01'))
+    end_date = pd.Timestamp(args.end) if args.end else pd.Timestamp.today().normalize()
+
+    # One fetch for the union of all universes; columns stay as raw symbols
+    dp = DataProvider.from_config(config)
+    symbols = sweep.symbols()
+    return dp.get_closes({s: s for s in symbols}, start_date, end_date)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep over lookbacks, ticker universes and tie-break rules.")
+    parser.add_argument("--config", default="app/config/config.yaml")
+    parser.add_argument("--start", default=None, help="First date of price history (default: sweep.start).")
+    parser.add_argument("--end", default=None, help="Last date of price history (default: today).")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="cagr", help="Column to rank by, e.g. cagr or max_drawdown.")
+    parser.add_argument("--output", default=None, help="Optional CSV path for the results table.")
+    parser.add_argument("--matrix", default=None, help="Price matrix file to read instead of fetching; uses its full date range (see price_matrix.py).")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+
+    sweep = ParameterSweep(config['sweep'])
+    if args.matrix:
+        results = sweep.run_from_matrix(args.matrix, workers=args.workers, rank_by=args.rank_by)
+    else:
+        results = sweep.run(fetch_prices(config, sweep, args), workers=args.workers, rank_by=args.rank_by)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(results)
+
+    if args.output:
+        results.to_csv(args.output)
+        print(f"Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import zlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from data_provider import DataProvider
+from market_calendar import MarketCalendar
+from price_store import PriceStore
+
+class SyntheticDataProvider(DataProvider):
+    """
+    Deterministic offline stand-in for DataProvider.
+
+    Instead of calling Yahoo it generates a yfinance-shaped OHLCV frame
+    (MultiIndex columns: Price x Ticker) on NYSE sessions, so everything
+    downstream of the download - column normalization, the price store,
+    as-of lookups, strategy and reporting - runs unchanged. Every symbol
+    follows its own geometric random walk seeded from the symbol name, so the
+    same symbol and dates always give the same prices.
+    """
+
+    def __init__(self, store: Optional[PriceStore] = None, seed: int = 0, annual_drift: float = 0.06, annual_vol: float = 0.18, **kwargs):
+        super().__init__(store=store, **kwargs)
+        self.seed = seed
+        self.daily_drift = annual_drift / 252
+        self.daily_vol = annual_vol / np.sqrt(252)
+
+    @staticmethod
+    def make_tickers(n: int, prefix: str = "SYM") -> Dict[str, str]:
+        """
+        Builds a tickers map with n synthetic symbols, keys equal to symbols.
+        """
+        return {f"{prefix}{i:04d}": f"{prefix}{i:04d}" for i in range(n)}
+
+    def _symbol_closes(self, symbol: str, sessions: pd.DatetimeIndex) -> np.ndarray:
+        # Walk is anchored at the start of the calendar table, so any date window
+        # of the same symbol returns identical prices
+        all_sessions = MarketCalendar.get_session_days()
+        first = np.searchsorted(all_sessions, sessions[0].to_numpy().astype('datetime64[D]').astype(np.int64))
+
+        rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+        steps = rng.normal(self.daily_drift, self.daily_vol, first + len(sessions))
+        log_prices = np.log(50 + zlib.crc32(symbol.encode()) % 200) + np.cumsum(steps)
+        return np.exp(log_prices[first:])
+
+    def _fetch_raw(self, symbols: List[str], start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+        sessions = MarketCalendar.sessions(start_date, end_date)
+        if len(sessions) == 0:
+            return pd.DataFrame()
+
+        data = {}
+        for symbol in symbols:
+            close = self._symbol_closes(symbol, sessions)
+            data[("Close", symbol)] = close
+            data[("High", symbol)] = close * 1.005
+            data[("Low", symbol)] = close * 0.995
+            data[("Open", symbol)] = close
+            data[("Volume", symbol)] = np.full(len(sessions), 1_000_000.0)
+
+        df = pd.DataFrame(data, index=sessions)
+        df.columns = pd.MultiIndex.from_tuples(df.columns, names=["Price", "Ticker"])
+        df.index.name = "Date"
+        return df.sort_index(axis=1, level=0)
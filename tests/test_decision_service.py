@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+from decision_service import DecisionService
+from price_store import PriceStore
+from synthetic_data import SyntheticDataProvider
+
+CONFIG = {
+    "tickers": {"US": "SPY", "EXUS": "VEU", "BONDS": "BND", "CASH_PROXY": "BIL"},
+    "strategy": {"lookback_months": 12},
+}
+
+def test_fetch_update_in_executor_with_sqlite_store(tmp_path):
+    # The store is opened here, on the main thread, like in decision_service.main()
+    store = PriceStore(str(tmp_path / "prices.sqlite"))
+    service = DecisionService(CONFIG, history_start="2020-01-01", provider=SyntheticDataProvider(store=store))
+
+    async def load_and_refresh():
+        # Same calls as DecisionServer.serve() and _refresh_loop()
+        loop = asyncio.get_running_loop()
+        service.apply_update(await loop.run_in_executor(None, service.fetch_update))
+        return await loop.run_in_executor(None, service.fetch_update)
+
+    try:
+        update = asyncio.run(load_and_refresh())
+
+        assert service.prices is not None and len(service.prices) > 0
+        # The refresh only re-fetched the last bar, which did not change
+        assert update is None
+        assert store.get_coverage("SPY") is not None
+        assert json.loads(service.decision())["selected_asset"] in CONFIG["tickers"]
+    finally:
+        store.close()